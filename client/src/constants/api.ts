@@ -6,6 +6,8 @@ export const API_ROUTES = {
     OAUTH_REGISTER: '/auth/oauth/register',
     GOOGLE_LOGIN: '/auth/oauth/google/login',
     ORCID_LOGIN: '/auth/oauth/orcid/login',
+    REFRESH: '/auth/refresh',
+    LOGOUT: '/auth/logout',
   },
 
   // Mentor endpoints
@@ -31,6 +33,11 @@ export const DEFAULT_PAGE_SIZE = 10;
 
 export const AUTH_STORAGE_KEY = 'token';
 
+export const REFRESH_STORAGE_KEY = 'refresh_token';
+
+// Matches REFRESH_TOKEN_EXPIRE_DAYS on the server
+export const REFRESH_TOKEN_DAYS = 30;
+
 export const ERROR_MESSAGES = {
   NETWORK_ERROR: 'Unable to connect to the server. Please check your internet connection.',
   UNAUTHORIZED: 'Please log in to continue.',
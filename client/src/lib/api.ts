@@ -1,6 +1,6 @@
 import axios, { AxiosError, InternalAxiosRequestConfig, AxiosResponse } from 'axios';
 import { ApiError } from '../types/api';
-import { getStoredToken } from './authApi';
+import { getStoredToken, refreshAccessToken } from './authApi';
 
 interface ErrorResponse {
     detail: Array<{
@@ -33,9 +33,25 @@ api.interceptors.request.use(
     }
 );
 
+interface RetryableRequestConfig extends InternalAxiosRequestConfig {
+    _retried?: boolean;
+}
+
 api.interceptors.response.use(
     (response: AxiosResponse) => response.data,
-    (error: AxiosError<ErrorResponse>) => {
+    async (error: AxiosError<ErrorResponse>) => {
+        // Access tokens are short lived; refresh once and replay the request
+        const original = error.config as RetryableRequestConfig | undefined;
+        if (error.response?.status === 401 && original && !original._retried &&
+            !original.url?.startsWith('/auth/')) {
+            original._retried = true;
+            const token = await refreshAccessToken();
+            if (token) {
+                original.headers.Authorization = `Bearer ${token}`;
+                return api(original);
+            }
+        }
+
         const apiError: ApiError = {
             message: 'An unexpected error occurred',
             code: 'UNKNOWN_ERROR',
@@ -1,5 +1,12 @@
+import axios from 'axios';
 import api from './api';
-import { API_ROUTES, AUTH_STORAGE_KEY } from '../constants/api';
+import {
+  API_BASE_URL,
+  API_ROUTES,
+  AUTH_STORAGE_KEY,
+  REFRESH_STORAGE_KEY,
+  REFRESH_TOKEN_DAYS
+} from '../constants/api';
 import { User } from '../types/api';
 import { jwtDecode } from 'jwt-decode';
 import Cookies from 'js-cookie';
@@ -7,7 +14,9 @@ import { getUser } from './auth';
 
 export interface LoginResponse {
   access_token: string;
+  refresh_token: string;
   token_type: string;
+  expires_in: number;
 }
 
 export interface AuthResponse {
@@ -50,6 +59,22 @@ const cookieOptions = {
   sameSite: 'lax' as const
 };
 
+function storeTokens(response: LoginResponse): User {
+  const decoded = jwtDecode<JwtPayload>(response.access_token);
+  const expires = new Date(decoded.exp * 1000);
+
+  Cookies.set(AUTH_STORAGE_KEY, response.access_token, {
+    ...cookieOptions,
+    expires
+  });
+  Cookies.set(REFRESH_STORAGE_KEY, response.refresh_token, {
+    ...cookieOptions,
+    expires: REFRESH_TOKEN_DAYS
+  });
+
+  return decoded.user;
+}
+
 // Email/Password Authentication
 export async function login(email: string, password: string): Promise<User> {
   const formData = new URLSearchParams();
@@ -62,15 +87,7 @@ export async function login(email: string, password: string): Promise<User> {
     }
   }) as LoginResponse;
 
-  const decoded = jwtDecode<JwtPayload>(response.access_token);
-  const expires = new Date(decoded.exp * 1000);
-  
-  Cookies.set(AUTH_STORAGE_KEY, response.access_token, {
-    ...cookieOptions,
-    expires
-  });
-  
-  return decoded.user;
+  return storeTokens(response);
 }
 
 export async function register(data: RegisterData): Promise<AuthResponse> {
@@ -87,29 +104,13 @@ export async function registerWithOAuth(data: OAuthRegisterData): Promise<AuthRe
 export async function loginWithGoogle(token: string): Promise<User> {
   const response = await api.post(API_ROUTES.AUTH.GOOGLE_LOGIN, { google_token: token }) as LoginResponse;
   
-  const decoded = jwtDecode<JwtPayload>(response.access_token);
-  const expires = new Date(decoded.exp * 1000);
-  
-  Cookies.set(AUTH_STORAGE_KEY, response.access_token, {
-    ...cookieOptions,
-    expires
-  });
-  
-  return decoded.user;
+  return storeTokens(response);
 }
 
 export async function loginWithOrcid(token: string): Promise<User> {
   const response = await api.post(API_ROUTES.AUTH.ORCID_LOGIN, { orcid_token: token }) as LoginResponse;
   
-  const decoded = jwtDecode<JwtPayload>(response.access_token);
-  const expires = new Date(decoded.exp * 1000);
-  
-  Cookies.set(AUTH_STORAGE_KEY, response.access_token, {
-    ...cookieOptions,
-    expires
-  });
-  
-  return decoded.user;
+  return storeTokens(response);
 }
 
 // Token Management
@@ -119,6 +120,56 @@ export function getStoredToken(): string | null {
 
 export function clearStoredToken(): void {
   Cookies.remove(AUTH_STORAGE_KEY, cookieOptions);
+  Cookies.remove(REFRESH_STORAGE_KEY, cookieOptions);
+}
+
+export function hasRefreshToken(): boolean {
+  return !!Cookies.get(REFRESH_STORAGE_KEY);
+}
+
+let refreshInFlight: Promise<string | null> | null = null;
+
+// Refresh tokens are single use, so concurrent callers share one request.
+// Uses plain axios to bypass the 401 handling in the api instance.
+export function refreshAccessToken(): Promise<string | null> {
+  const refreshToken = Cookies.get(REFRESH_STORAGE_KEY);
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+
+  if (!refreshInFlight) {
+    refreshInFlight = axios
+      .post<LoginResponse>(
+        `${API_BASE_URL}${API_ROUTES.AUTH.REFRESH}`,
+        { refresh_token: refreshToken },
+        { withCredentials: true }
+      )
+      .then(({ data }) => {
+        storeTokens(data);
+        return data.access_token;
+      })
+      .catch(() => {
+        clearStoredToken();
+        return null;
+      })
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+
+  return refreshInFlight;
+}
+
+// Revoke the session on the server, not just locally
+export async function revokeSession(): Promise<void> {
+  const refreshToken = Cookies.get(REFRESH_STORAGE_KEY);
+  clearStoredToken();
+
+  if (refreshToken) {
+    await axios
+      .post(`${API_BASE_URL}${API_ROUTES.AUTH.LOGOUT}`, { refresh_token: refreshToken })
+      .catch(() => undefined);
+  }
 }
 
 export function isAuthenticated(): boolean {
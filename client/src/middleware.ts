@@ -4,6 +4,7 @@ import { verifyToken } from '@/lib/auth';
 
 export async function middleware(request: NextRequest) {
     const token = request.cookies.get('token')?.value;
+    const refreshToken = request.cookies.get('refresh_token')?.value;
 
     // Handle login page access
     if (request.nextUrl.pathname.startsWith('/login')) {
@@ -21,6 +22,10 @@ export async function middleware(request: NextRequest) {
     // Handle dashboard access
     if (request.nextUrl.pathname.startsWith('/dashboard')) {
         if (!token) {
+            // Let the client exchange the refresh token for a new access token
+            if (refreshToken) {
+                return NextResponse.next();
+            }
             return NextResponse.redirect(new URL('/login', request.url));
         }
 
@@ -32,6 +37,9 @@ export async function middleware(request: NextRequest) {
 
             return NextResponse.next();
         } catch {
+            if (refreshToken) {
+                return NextResponse.next();
+            }
             return NextResponse.redirect(new URL('/login', request.url));
         }
     }
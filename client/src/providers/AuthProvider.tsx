@@ -3,6 +3,7 @@
 import { useEffect } from 'react';
 import { useAuthStore } from '@/store/authStore';
 import { getUser } from '@/lib/auth';
+import { hasRefreshToken, refreshAccessToken } from '@/lib/authApi';
 
 export function AuthProvider({ children }: { children: React.ReactNode }) {
   const { setAuth, setLoading } = useAuthStore();
@@ -12,8 +13,22 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     const user = getUser();
     if (user) {
       setAuth(user);
+      setLoading(false);
+      return;
     }
-    setLoading(false);
+
+    // The access token expired but the session may still be alive
+    if (!hasRefreshToken()) {
+      setLoading(false);
+      return;
+    }
+    refreshAccessToken().then(() => {
+      const refreshedUser = getUser();
+      if (refreshedUser) {
+        setAuth(refreshedUser);
+      }
+      setLoading(false);
+    });
   }, [setAuth, setLoading]);
 
   return <>{children}</>;
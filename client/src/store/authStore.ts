@@ -1,7 +1,6 @@
 import { create } from 'zustand';
 import { MentorResponse, User } from '../types/api';
-import Cookies from 'js-cookie';
-import { AUTH_STORAGE_KEY } from '@/constants/api';
+import { revokeSession } from '@/lib/authApi';
 
 export type AuthenticatedUser = User | MentorResponse;
 
@@ -23,7 +22,7 @@ export const useAuthStore = create<AuthState>((set, get) => ({
   error: null,
   setAuth: (user) => set({ user, loading: false, error: null }),
   logout: () => {
-    Cookies.remove(AUTH_STORAGE_KEY);
+    void revokeSession();
     set({ user: null, loading: false, error: null });
   },
   setLoading: (loading) => set({ loading }),
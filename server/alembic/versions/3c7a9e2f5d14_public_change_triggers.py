@@ -0,0 +1,91 @@
+"""Public change triggers
+
+Limit the mentor_changed notification and mentor_public refresh triggers
+to changes public reads can see: inserts and deletes of approved mentors,
+and updates of a public column on a row that is or was approved. Pending
+registrations and password rehashes no longer clear every worker's caches
+or rebuild read model documents.
+
+Revision ID: 3c7a9e2f5d14
+Revises: 9e4c2d7f1b68
+Create Date: 2026-10-19 18:04:12.518734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7a9e2f5d14'
+down_revision: Union[str, None] = '9e4c2d7f1b68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# As app.models.mentor.PUBLIC_COLUMNS when this revision was written
+PUBLIC_COLUMNS = (
+    "id", "full_name", "email", "current_role", "institution", "department", "degrees",
+    "research_interests", "continent", "country", "city", "latitude", "longitude",
+    "linkedin_url", "profile_picture_url", "auth_provider", "moderation_status",
+    "created_at", "updated_at"
+)
+
+UPDATE_OF = ", ".join(f'"{column}"' for column in PUBLIC_COLUMNS)
+UPDATE_WHEN = (
+    "(OLD.moderation_status = 'APPROVED' OR NEW.moderation_status = 'APPROVED') AND "
+    f"ROW({', '.join(f'OLD.{column}' for column in PUBLIC_COLUMNS)}) IS DISTINCT FROM "
+    f"ROW({', '.join(f'NEW.{column}' for column in PUBLIC_COLUMNS)})"
+)
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_change ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_insert ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_delete ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_notify_insert AFTER INSERT ON mentors "
+        "FOR EACH ROW WHEN (NEW.moderation_status = 'APPROVED') "
+        "EXECUTE FUNCTION mentor_notify_change()"
+    )
+    op.execute(
+        f"CREATE TRIGGER mentor_notify_change AFTER UPDATE OF {UPDATE_OF} ON mentors "
+        f"FOR EACH ROW WHEN ({UPDATE_WHEN}) "
+        "EXECUTE FUNCTION mentor_notify_change()"
+    )
+    op.execute(
+        "CREATE TRIGGER mentor_notify_delete AFTER DELETE ON mentors "
+        "FOR EACH ROW WHEN (OLD.moderation_status = 'APPROVED') "
+        "EXECUTE FUNCTION mentor_notify_change()"
+    )
+
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_refresh ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_insert ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_public_insert AFTER INSERT ON mentors "
+        "FOR EACH ROW WHEN (NEW.moderation_status = 'APPROVED') "
+        "EXECUTE FUNCTION mentor_public_refresh()"
+    )
+    op.execute(
+        f"CREATE TRIGGER mentor_public_refresh AFTER UPDATE OF {UPDATE_OF} ON mentors "
+        f"FOR EACH ROW WHEN ({UPDATE_WHEN}) "
+        "EXECUTE FUNCTION mentor_public_refresh()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_insert ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_refresh ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_public_refresh "
+        "AFTER INSERT OR UPDATE ON mentors "
+        "FOR EACH ROW EXECUTE FUNCTION mentor_public_refresh()"
+    )
+
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_insert ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_delete ON mentors")
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_change ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_notify_change "
+        "AFTER INSERT OR UPDATE OR DELETE ON mentors "
+        "FOR EACH ROW EXECUTE FUNCTION mentor_notify_change()"
+    )
@@ -0,0 +1,144 @@
+"""Mentor public read model
+
+Adds mentor_public, a trigger-maintained table with one row per approved
+mentor: the public columns needed for filtering and ordering, lowercased
+search keys and the MentorResponse document as jsonb. Approved mentors are
+backfilled. A table already made by create_all is kept, and its functions
+and trigger are replaced.
+
+Revision ID: 5b1f0c7e9a43
+Revises: c83f5a1e6d27
+Create Date: 2026-10-19 11:02:17.904112
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c7e9a43'
+down_revision: Union[str, None] = 'c83f5a1e6d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_public_sync(mentor_id uuid) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO mentor_public (
+        id, full_name, research_interests, search_key, interests_key,
+        continent_key, country_key, city_key, doc, refreshed_at
+    )
+    SELECT
+        m.id,
+        m.full_name,
+        m.research_interests,
+        lower(concat_ws(chr(31),
+            m.full_name, m.email, m.institution, m.department, m.current_role,
+            array_to_string(m.research_interests, ' ', ''),
+            array_to_string(m.degrees, ' ', '')
+        )),
+        lower(array_to_string(m.research_interests, ',', '')),
+        lower(m.continent),
+        lower(m.country),
+        lower(m.city),
+        jsonb_build_object(
+            'id', m.id,
+            'full_name', m.full_name,
+            'email', m.email,
+            'current_role', m.current_role,
+            'institution', m.institution,
+            'department', m.department,
+            'degrees', m.degrees,
+            'research_interests', m.research_interests,
+            'continent', m.continent,
+            'country', m.country,
+            'city', m.city,
+            'latitude', m.latitude,
+            'longitude', m.longitude,
+            'linkedin_url', m.linkedin_url,
+            'profile_picture_url', m.profile_picture_url,
+            'auth_provider', lower(m.auth_provider::text),
+            'moderation_status', lower(m.moderation_status::text),
+            'created_at', m.created_at,
+            'updated_at', m.updated_at
+        ),
+        now()
+    FROM mentors m
+    WHERE m.id = mentor_id AND m.moderation_status = 'APPROVED'
+    ON CONFLICT (id) DO UPDATE SET
+        full_name = EXCLUDED.full_name,
+        research_interests = EXCLUDED.research_interests,
+        search_key = EXCLUDED.search_key,
+        interests_key = EXCLUDED.interests_key,
+        continent_key = EXCLUDED.continent_key,
+        country_key = EXCLUDED.country_key,
+        city_key = EXCLUDED.city_key,
+        doc = EXCLUDED.doc,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    IF NOT FOUND THEN
+        DELETE FROM mentor_public WHERE id = mentor_id;
+    END IF;
+END
+$$
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_public_refresh() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM mentor_public_sync(NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    exists = not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('mentor_public')
+    if not exists:
+        _create_table()
+
+    op.execute(SYNC_FUNCTION)
+    op.execute(TRIGGER_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_refresh ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_public_refresh "
+        "AFTER INSERT OR UPDATE ON mentors "
+        "FOR EACH ROW EXECUTE FUNCTION mentor_public_refresh()"
+    )
+    op.execute("SELECT mentor_public_sync(id) FROM mentors WHERE moderation_status = 'APPROVED'")
+
+
+def _create_table() -> None:
+    op.create_table(
+        'mentor_public',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('research_interests', postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column('search_key', sa.String(), nullable=False),
+        sa.Column('interests_key', sa.String(), nullable=False),
+        sa.Column('continent_key', sa.String(), nullable=False),
+        sa.Column('country_key', sa.String(), nullable=False),
+        sa.Column('city_key', sa.String(), nullable=False),
+        sa.Column('doc', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['mentors.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_mentor_public_name', 'mentor_public', ['full_name', 'id'])
+    op.create_index('ix_mentor_public_country_name', 'mentor_public', ['country_key', 'full_name', 'id'])
+    op.create_index('ix_mentor_public_continent_key', 'mentor_public', ['continent_key'])
+    op.create_index('ix_mentor_public_city_key', 'mentor_public', ['city_key'])
+    op.create_index('ix_mentor_public_research_interests', 'mentor_public', ['research_interests'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS mentor_public_refresh ON mentors")
+    op.execute("DROP FUNCTION IF EXISTS mentor_public_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS mentor_public_sync(uuid)")
+    op.drop_table('mentor_public')
@@ -0,0 +1,111 @@
+"""Baseline schema
+
+Creates the tables that previously only existed through create_all. Tables
+that are already there, e.g. on databases created by create_all, are left
+untouched, so this is safe to run against existing deployments.
+
+Enum columns store member names (PENDING, APPROVED, ...), matching what
+SQLAlchemy's Enum type writes.
+
+Revision ID: 7d4e2b9c1a05
+Revises: e2a9f3599afd
+Create Date: 2026-10-19 09:12:41.218553
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e2b9c1a05'
+down_revision: Union[str, None] = 'e2a9f3599afd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+moderation_status = postgresql.ENUM('PENDING', 'APPROVED', 'REJECTED', name='moderationstatus', create_type=False)
+auth_provider = postgresql.ENUM('EMAIL', 'GOOGLE', 'ORCID', name='authprovider', create_type=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Offline (--sql) output assumes an empty database
+    existing = set() if context.is_offline_mode() else set(sa.inspect(bind).get_table_names())
+
+    moderation_status.create(bind, checkfirst=True)
+    auth_provider.create(bind, checkfirst=True)
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', postgresql.UUID(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('full_name', sa.String(), nullable=False),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'mentors' not in existing:
+        op.create_table(
+            'mentors',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('hashed_password', sa.String(), nullable=True),
+            sa.Column('auth_provider', auth_provider, nullable=False),
+            sa.Column('orcid_id', sa.String(), nullable=True),
+            sa.Column('google_id', sa.String(), nullable=True),
+            sa.Column('full_name', sa.String(), nullable=False),
+            sa.Column('profile_picture_url', sa.String(), nullable=True),
+            sa.Column('current_role', sa.String(), nullable=False),
+            sa.Column('institution', sa.String(), nullable=False),
+            sa.Column('department', sa.String(), nullable=False),
+            sa.Column('degrees', postgresql.ARRAY(sa.String()), nullable=False),
+            sa.Column('research_interests', postgresql.ARRAY(sa.String()), nullable=False),
+            sa.Column('continent', sa.String(), nullable=False),
+            sa.Column('country', sa.String(), nullable=False),
+            sa.Column('city', sa.String(), nullable=False),
+            sa.Column('latitude', sa.Float(), nullable=False),
+            sa.Column('longitude', sa.Float(), nullable=False),
+            sa.Column('linkedin_url', sa.String(), nullable=True),
+            sa.Column('moderation_status', moderation_status, nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('orcid_id'),
+            sa.UniqueConstraint('google_id')
+        )
+        op.create_index('ix_mentors_email', 'mentors', ['email'], unique=True)
+        op.create_index('ix_mentors_institution', 'mentors', ['institution'])
+        op.create_index('ix_mentors_research_interests', 'mentors', ['research_interests'])
+        op.create_index('ix_mentors_continent', 'mentors', ['continent'])
+        op.create_index('ix_mentors_country', 'mentors', ['country'])
+        op.create_index('ix_mentors_moderation_status', 'mentors', ['moderation_status'])
+
+    if 'refresh_tokens' not in existing:
+        op.create_table(
+            'refresh_tokens',
+            sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('token_hash', sa.String(), nullable=False),
+            sa.Column('family_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('subject_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('rotated_at', sa.DateTime(), nullable=True),
+            sa.Column('revoked_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_refresh_tokens_token_hash', 'refresh_tokens', ['token_hash'], unique=True)
+        op.create_index('ix_refresh_tokens_family_id', 'refresh_tokens', ['family_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('refresh_tokens')
+    op.drop_table('mentors')
+    op.drop_table('users')
+    auth_provider.drop(op.get_bind(), checkfirst=True)
+    moderation_status.drop(op.get_bind(), checkfirst=True)
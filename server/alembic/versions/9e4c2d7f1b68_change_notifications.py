@@ -0,0 +1,73 @@
+"""Change notifications
+
+Row triggers that NOTIFY listening workers of committed changes:
+mentor_changed with the mentor id and a revision from mentor_change_seq,
+and token_revoked with the family of a revoked refresh token.
+
+Revision ID: 9e4c2d7f1b68
+Revises: 5b1f0c7e9a43
+Create Date: 2026-10-19 12:26:48.310279
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4c2d7f1b68'
+down_revision: Union[str, None] = '5b1f0c7e9a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MENTOR_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_notify_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('mentor_changed', json_build_object(
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        'revision', nextval('mentor_change_seq'),
+        'op', lower(TG_OP)
+    )::text);
+    RETURN NULL;
+END
+$$
+"""
+
+TOKEN_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION refresh_token_notify_revoked() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('token_revoked', json_build_object('family_id', NEW.family_id)::text);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS mentor_change_seq")
+    op.execute(MENTOR_NOTIFY_FUNCTION)
+    op.execute(TOKEN_NOTIFY_FUNCTION)
+    # Already installed on databases created by create_all
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_change ON mentors")
+    op.execute(
+        "CREATE TRIGGER mentor_notify_change "
+        "AFTER INSERT OR UPDATE OR DELETE ON mentors "
+        "FOR EACH ROW EXECUTE FUNCTION mentor_notify_change()"
+    )
+    op.execute("DROP TRIGGER IF EXISTS refresh_token_notify_revoked ON refresh_tokens")
+    op.execute(
+        "CREATE TRIGGER refresh_token_notify_revoked "
+        "AFTER UPDATE OF revoked_at ON refresh_tokens "
+        "FOR EACH ROW WHEN (OLD.revoked_at IS NULL AND NEW.revoked_at IS NOT NULL) "
+        "EXECUTE FUNCTION refresh_token_notify_revoked()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS refresh_token_notify_revoked ON refresh_tokens")
+    op.execute("DROP TRIGGER IF EXISTS mentor_notify_change ON mentors")
+    op.execute("DROP FUNCTION IF EXISTS refresh_token_notify_revoked()")
+    op.execute("DROP FUNCTION IF EXISTS mentor_notify_change()")
+    op.execute("DROP SEQUENCE IF EXISTS mentor_change_seq")
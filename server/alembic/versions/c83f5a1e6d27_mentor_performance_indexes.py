@@ -0,0 +1,74 @@
+"""Mentor performance indexes
+
+Indexes for the public read paths:
+- partial indexes over approved mentors for search ordering and the
+  country/city filters, which compare lower(...) values
+- a GIN index over approved mentors' research_interests for the globe's
+  array containment filter
+- lower(email) for case-insensitive lookups
+- pending mentors by creation time for the moderation queue
+
+Every index is built with CREATE INDEX CONCURRENTLY outside a transaction,
+so the migration can run against a live database without blocking writes.
+An index left INVALID by an interrupted build is dropped and rebuilt.
+
+Revision ID: c83f5a1e6d27
+Revises: 7d4e2b9c1a05
+Create Date: 2026-10-19 09:40:03.551270
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83f5a1e6d27'
+down_revision: Union[str, None] = '7d4e2b9c1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum columns store member names
+APPROVED = sa.text("moderation_status = 'APPROVED'")
+PENDING = sa.text("moderation_status = 'PENDING'")
+
+INDEXES = [
+    ('ix_mentors_approved_name', ['full_name', 'id'], dict(postgresql_where=APPROVED)),
+    ('ix_mentors_approved_country_name', [sa.text('lower(country)'), 'full_name', 'id'], dict(postgresql_where=APPROVED)),
+    ('ix_mentors_approved_city', [sa.text('lower(city)')], dict(postgresql_where=APPROVED)),
+    ('ix_mentors_approved_research_interests', ['research_interests'], dict(postgresql_using='gin', postgresql_where=APPROVED)),
+    ('ix_mentors_email_lower', [sa.text('lower(email)')], {}),
+    ('ix_mentors_pending_created_at', ['created_at'], dict(postgresql_where=PENDING)),
+]
+
+
+def _drop_if_invalid(name: str) -> None:
+    if context.is_offline_mode():
+        return
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, table_name='mentors', postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns, options in INDEXES:
+            _drop_if_invalid(name)
+            op.create_index(
+                name,
+                'mentors',
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **options
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='mentors', postgresql_concurrently=True, if_exists=True)
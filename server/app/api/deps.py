@@ -1,16 +1,19 @@
-from typing import AsyncGenerator, Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from typing import AsyncGenerator, Optional, Tuple
+from fastapi import Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from uuid import UUID
+import secrets
 
 from app.core.config import settings
-from app.db.session import AsyncSessionMaker
+from app.db.session import AsyncSessionMaker, ReadSessionMaker, replica_monitor
 from app.models.mentor import Mentor, ModerationStatus
-from app.models.auth import User
-from app.core.security import verify_password
+from app.schemas.mentor import MentorResponse
+from app.core.security import InvalidTokenError, decode_access_token
+from app.core.rate_limit import login_limiter
+from app.services import mentors as mentor_queries
+from app.services.tokens import is_family_revoked
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login",
@@ -25,6 +28,95 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+# Set after a write so the client reads its own changes from the primary
+READ_PRIMARY_COOKIE = "read_primary"
+
+async def get_read_session_maker(request: Request) -> async_sessionmaker:
+    """
+    Session factory for read-only endpoints. The read replica when one is
+    configured and caught up, otherwise the primary.
+    """
+    use_replica = (
+        replica_monitor is not None
+        and READ_PRIMARY_COOKIE not in request.cookies
+        and await replica_monitor.is_usable()
+    )
+    return ReadSessionMaker if use_replica else AsyncSessionMaker
+
+async def get_read_db(
+    session_maker: async_sessionmaker = Depends(get_read_session_maker)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only endpoints, see get_read_session_maker"""
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+def get_mentor_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated MentorResponse fields to return, e.g. id,full_name,latitude,longitude. All when omitted.",
+        examples=["id,full_name,research_interests"]
+    )
+) -> Optional[Tuple[str, ...]]:
+    """Requested sparse fieldset in MentorResponse field order, or None for all fields"""
+    if fields is None or not fields.strip():
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(MentorResponse.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return tuple(name for name in MentorResponse.model_fields if name in requested)
+
+def stick_to_primary(response: Response) -> None:
+    """Route this client's reads to the primary for DB_READ_STICKY_SECONDS"""
+    if replica_monitor is None or not settings.DB_READ_STICKY_SECONDS:
+        return
+    # The client calls the API cross-site outside development
+    cross_site = settings.ENVIRONMENT != "development"
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        "1",
+        max_age=settings.DB_READ_STICKY_SECONDS,
+        httponly=True,
+        secure=cross_site,
+        samesite="none" if cross_site else "lax"
+    )
+
+async def throttle_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends()
+) -> None:
+    """
+    Reject login attempts over the per-IP or per-account budget.
+    Runs before any database lookup or bcrypt verification.
+
+    The per-IP bucket limits credential stuffing. The account bucket is per
+    account and IP, so that guessing at one address does not lock its owner
+    out everywhere else.
+
+    The client IP is the peer address, or X-Forwarded-For when the peer is
+    in FORWARDED_ALLOW_IPS (see gunicorn_conf.py). Behind a proxy that is
+    not trusted, every client would share the proxy's bucket.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    account = form_data.username.strip().lower()
+    # The SQLite store may wait up to a second on the file lock of another worker
+    retry_after = await run_in_threadpool(login_limiter.check, {
+        "ip": client_ip,
+        "account": f"{account}|{client_ip}"
+    })
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+
 async def get_current_mentor(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
@@ -39,11 +131,7 @@ async def get_current_mentor(
     )
     
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         mentor_id: str = payload.get("sub")
         if mentor_id is None:
             raise credentials_exception
@@ -53,12 +141,14 @@ async def get_current_mentor(
         except ValueError:
             raise credentials_exception
             
-    except JWTError:
+    except InvalidTokenError:
+        raise credentials_exception
+    
+    family_id = payload.get("fam")
+    if family_id and await is_family_revoked(db, family_id):
         raise credentials_exception
     
-    stmt = select(Mentor).where(Mentor.id == mentor_uuid)
-    result = await db.execute(stmt)
-    mentor = result.scalar_one_or_none()
+    mentor = await mentor_queries.get_mentor_by_id(db, mentor_uuid)
     
     if not mentor:
         raise HTTPException(
@@ -77,11 +167,7 @@ async def verify_admin(
     This is separate from mentor authentication.
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         user_id = payload.get("sub")
         role = payload.get("role")
         
@@ -91,9 +177,14 @@ async def verify_admin(
                 detail="Admin access required"
             )
             
-        stmt = select(User).where(User.id == user_id, User.role == "admin")
-        result = await db.execute(stmt)
-        admin = result.scalar_one_or_none()
+        family_id = payload.get("fam")
+        if family_id and await is_family_revoked(db, family_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials"
+            )
+            
+        admin = await mentor_queries.get_admin_by_id(db, user_id)
         
         if not admin:
             raise HTTPException(
@@ -103,12 +194,24 @@ async def verify_admin(
             
         return True
         
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials"
         )
 
+def verify_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """Require METRICS_TOKEN as a bearer token when one is configured (always, outside development)"""
+    if not settings.METRICS_TOKEN:
+        return
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if not secrets.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
 async def get_optional_mentor(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
@@ -1,11 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from typing import List, Literal, Optional, Tuple
 from sqlalchemy import select
+from sqlalchemy.orm import load_only
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.mentor import Mentor
 from app.models.enums import ModerationStatus
 from app.schemas.mentor import MentorResponse
+from app.schemas.admin import (
+    ChangeNotificationStats,
+    DatabasePoolStats,
+    AllocationGrowth,
+    LoginThrottleStats,
+    MemoryStats,
+    ProfileSummary,
+    RouteQueryStats,
+    SlowQuery
+)
+from app.core.memory import memory_stats, memory_tracer
+from app.core.profiling import profiler
+from app.core.rate_limit import login_limiter
+from app.core.serialization import partial_model, raw_json_response, render_list
+from app.db.instrumentation import route_query_stats
+from app.db.notifications import change_listener
+from app.db.session import get_pool_stats
+from app.db.slow_queries import slow_query_log
 from app.api import deps
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -19,14 +40,17 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 async def list_all_mentors(
     db: AsyncSession = Depends(deps.get_db),
     _: bool = Depends(deps.verify_admin),
-    status: Optional[ModerationStatus] = Query(None, description="Filter by moderation status")
+    status: Optional[ModerationStatus] = Query(None, description="Filter by moderation status"),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_mentor_fields)
 ) -> List[MentorResponse]:
     """List all mentor profiles with optional status filter"""
     query = select(Mentor)
     if status:
         query = query.where(Mentor.moderation_status == status)
+    if fields:
+        query = query.options(load_only(*(getattr(Mentor, name) for name in fields)))
     result = await db.execute(query)
-    return result.scalars().all()
+    return raw_json_response(render_list(partial_model(MentorResponse, fields), result.scalars()))
 
 @router.get(
     "/mentors/pending",
@@ -36,12 +60,15 @@ async def list_all_mentors(
 )
 async def list_pending_mentors(
     db: AsyncSession = Depends(deps.get_db),
-    _: bool = Depends(deps.verify_admin)
+    _: bool = Depends(deps.verify_admin),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_mentor_fields)
 ) -> List[MentorResponse]:
     """List pending mentor profiles"""
     query = select(Mentor).where(Mentor.moderation_status == ModerationStatus.PENDING)
+    if fields:
+        query = query.options(load_only(*(getattr(Mentor, name) for name in fields)))
     result = await db.execute(query)
-    return result.scalars().all()
+    return raw_json_response(render_list(partial_model(MentorResponse, fields), result.scalars()))
 
 @router.put(
     "/mentors/{mentor_id}/approve",
@@ -100,3 +127,178 @@ async def reject_mentor(
     await db.refresh(mentor)
     
     return mentor
+
+@router.get(
+    "/stats/login-throttle",
+    response_model=LoginThrottleStats,
+    summary="Login Throttle Stats",
+    description="Login rate limiter counters for the worker serving the request. Admin only."
+)
+async def get_login_throttle_stats(
+    _: bool = Depends(deps.verify_admin)
+) -> LoginThrottleStats:
+    """Get login rate limiter counters"""
+    return login_limiter.stats()
+
+@router.get(
+    "/stats/db-pool",
+    response_model=DatabasePoolStats,
+    summary="Database Pool Stats",
+    description="Connection pool usage and checkout wait times for the worker serving the request. Admin only."
+)
+async def get_db_pool_stats(
+    _: bool = Depends(deps.verify_admin)
+) -> DatabasePoolStats:
+    """Get database connection pool statistics"""
+    return get_pool_stats()
+
+@router.get(
+    "/stats/cache",
+    response_model=ChangeNotificationStats,
+    summary="Cache Stats",
+    description="Change listener state and in-process cache counters for the worker serving the request. Admin only."
+)
+async def get_cache_stats(
+    _: bool = Depends(deps.verify_admin)
+) -> ChangeNotificationStats:
+    """Get change notification and cache statistics"""
+    return change_listener.stats()
+
+@router.get(
+    "/stats/queries",
+    response_model=List[RouteQueryStats],
+    summary="Query Stats",
+    description="""
+    Database queries and time per route for the worker serving the request,
+    busiest routes first. Admin only.
+    """
+)
+async def get_query_stats(
+    _: bool = Depends(deps.verify_admin),
+    reset: bool = Query(False, description="Clear the counters after reading them")
+) -> List[RouteQueryStats]:
+    """Get per-route query statistics"""
+    snapshot = route_query_stats.snapshot()
+    if reset:
+        route_query_stats.reset()
+    return snapshot
+
+@router.get(
+    "/stats/slow-queries",
+    response_model=List[SlowQuery],
+    summary="Slow Queries",
+    description="""
+    Recent statements slower than SLOW_QUERY_THRESHOLD_MS on the worker
+    serving the request, newest first, with sampled EXPLAIN ANALYZE plans.
+    Admin only.
+    """
+)
+async def get_slow_queries(
+    _: bool = Depends(deps.verify_admin),
+    with_plan: bool = Query(False, description="Only entries with a captured plan")
+) -> List[SlowQuery]:
+    """Get the slow query log"""
+    entries = reversed(slow_query_log.entries)
+    if with_plan:
+        return [entry for entry in entries if entry["plan"]]
+    return list(entries)
+
+@router.get(
+    "/stats/memory",
+    response_model=MemoryStats,
+    summary="Memory Stats",
+    description="Resident memory and allocation tracing state of the worker serving the request. Admin only."
+)
+async def get_memory_stats(
+    _: bool = Depends(deps.verify_admin)
+) -> MemoryStats:
+    """Get worker memory statistics"""
+    return memory_stats()
+
+@router.put(
+    "/stats/memory/tracing",
+    response_model=MemoryStats,
+    summary="Set Allocation Tracing",
+    description="""
+    Turn tracemalloc on or off for the worker serving the request. Turning
+    it on takes the baseline that allocation growth is measured from.
+    Tracing slows the worker down, so turn it off when done. Admin only.
+    """
+)
+def set_memory_tracing(
+    _: bool = Depends(deps.verify_admin),
+    enabled: bool = Query(..., description="Trace allocations"),
+    frames: int = Query(1, ge=1, le=50, description="Traceback frames kept per allocation")
+) -> MemoryStats:
+    """Start or stop allocation tracing"""
+    if enabled:
+        memory_tracer.start(frames)
+    elif memory_tracer.tracing:
+        memory_tracer.stop()
+    return memory_stats()
+
+@router.get(
+    "/stats/memory/allocations",
+    response_model=List[AllocationGrowth],
+    summary="Allocation Growth",
+    description="""
+    Allocation sites of the worker serving the request that grew most
+    since the tracing baseline, largest growth first. Needs tracing, see
+    PUT /admin/stats/memory/tracing. Admin only.
+    """
+)
+def get_allocation_growth(
+    _: bool = Depends(deps.verify_admin),
+    limit: int = Query(20, ge=1, le=200, description="Sites to return"),
+    group_by: Literal["lineno", "filename", "traceback"] = Query("lineno", description="Group allocations by"),
+    reset: bool = Query(False, description="Make this snapshot the new baseline")
+) -> List[AllocationGrowth]:
+    """Get the allocation sites that grew most"""
+    if not memory_tracer.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Allocation tracing is off on this worker"
+        )
+    return memory_tracer.top_growth(limit, group_by, reset)
+
+@router.get(
+    "/profiles",
+    response_model=List[ProfileSummary],
+    summary="Request Profiles",
+    description="""
+    Recent request profiles, newest first, of all workers when PROFILE_DIR
+    is set and of the worker serving the request otherwise. Send
+    X-Profile: 1 with an admin token on any request to profile it; its
+    X-Profile-Id response header names the profile. Admin only.
+    """
+)
+async def list_profiles(
+    _: bool = Depends(deps.verify_admin)
+) -> List[ProfileSummary]:
+    """List retained request profiles"""
+    return await run_in_threadpool(profiler.store.recent)
+
+@router.get(
+    "/profiles/{profile_id}",
+    summary="Request Profile",
+    description="""
+    Sampled stacks of one profiled request, as collapsed stacks for
+    flamegraph.pl or speedscope, or as speedscope JSON. Admin only.
+    """,
+    responses={200: {"content": {"text/plain": {}, "application/json": {}}}}
+)
+async def get_profile(
+    profile_id: str,
+    _: bool = Depends(deps.verify_admin),
+    format: Literal["collapsed", "speedscope"] = Query("collapsed", description="Output format")
+):
+    """Get one request profile"""
+    profile = await run_in_threadpool(profiler.store.get, profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "speedscope":
+        return profile["speedscope"]
+    return PlainTextResponse(profile["collapsed"])
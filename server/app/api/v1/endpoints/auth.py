@@ -10,22 +10,39 @@ Registration Flow:
    - Email/password login (/login)
    - Google OAuth login (/oauth/google/login)
    - ORCID OAuth login (/oauth/orcid/login)
+4. Exchange the refresh token for new tokens before the access token
+   expires (/refresh), and revoke the session with /logout
 """
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import Any
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Optional, Union
+from uuid import UUID
 from datetime import timedelta
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, verify_password, get_password_hash, validate_password
+from app.core.security import create_access_token, verify_and_update_password, get_password_hash, validate_password
 from app.core.config import settings
 from app.core.google_oauth import verify_google_token
 from app.schemas.mentor import MentorCreate, OAuthMentorCreate, MentorResponse
 from app.models.mentor import Mentor
 from app.models.auth import User
 from app.models.enums import AuthProvider, ModerationStatus
+from app.services.tokens import (
+    InvalidRefreshToken,
+    find_refresh_token,
+    issue_refresh_token,
+    revoke_family,
+    rotate_refresh_token
+)
+from app.services.accounts import (
+    DuplicateAccountError,
+    insert_mentor,
+    resolve_account_by_email,
+    resolve_google_account
+)
 from app.api import deps
 
 router = APIRouter(
@@ -36,45 +53,122 @@ router = APIRouter(
 # Set up logging
 logger = logging.getLogger(__name__)
 
+async def _verify_and_rehash(db: AsyncSession, account: Union[User, Mentor], password: str) -> bool:
+    """
+    Verify a password, replacing the stored hash if it was made with a
+    bcrypt cost other than BCRYPT_ROUNDS.
+    """
+    # bcrypt takes hundreds of milliseconds, keep it off the event loop
+    valid, new_hash = await run_in_threadpool(verify_and_update_password, password, account.hashed_password)
+    if valid and new_hash:
+        model = type(account)
+        values = {"hashed_password": new_hash}
+        if model is Mentor:
+            # A rehash is not a profile edit, keep updated_at as it was
+            values["updated_at"] = Mentor.updated_at
+        await db.execute(update(model).where(model.id == account.id).values(**values))
+        await db.commit()
+        logger.info("Rehashed password for %s", account.email)
+    return valid
+
+def _admin_user_data(user: User) -> dict:
+    """User claims embedded in an admin access token"""
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role
+    }
+
+def _mentor_user_data(mentor: Mentor) -> dict:
+    """User claims embedded in a mentor access token"""
+    return {
+        "id": str(mentor.id),
+        "email": mentor.email,
+        "full_name": mentor.full_name,
+        "role": "mentor",
+        "current_role": mentor.current_role,
+        "institution": mentor.institution,
+        "department": mentor.department,
+        "degrees": mentor.degrees,
+        "research_interests": mentor.research_interests,
+        "continent": mentor.continent,
+        "country": mentor.country,
+        "city": mentor.city,
+        "latitude": mentor.latitude,
+        "longitude": mentor.longitude,
+        "profile_picture_url": mentor.profile_picture_url,
+        "linkedin_url": mentor.linkedin_url,
+        "auth_provider": mentor.auth_provider.value,
+        "moderation_status": mentor.moderation_status.value,
+        "created_at": mentor.created_at.isoformat() if mentor.created_at else None,
+        "updated_at": mentor.updated_at.isoformat() if mentor.updated_at else None
+    }
+
+async def _issue_tokens(
+    db: AsyncSession,
+    subject_id: Any,
+    role: str,
+    user_data: dict,
+    family_id: Optional[UUID] = None
+) -> dict:
+    """Issue a short-lived access token and a refresh token from the same family"""
+    refresh_token, record = await issue_refresh_token(db, subject_id, role, family_id)
+    return {
+        "access_token": create_access_token(
+            subject=str(subject_id),
+            role=role,
+            user_data=user_data,
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            family_id=record.family_id
+        ),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+DUPLICATE_ACCOUNT_DETAILS = {
+    "email": "Email already registered",
+    "google_id": "Google account already registered",
+    "orcid_id": "ORCID account already registered"
+}
+
+async def _create_mentor(db: AsyncSession, values: dict) -> Mentor:
+    """Insert a mentor, mapping unique conflicts to the registration errors"""
+    try:
+        mentor = await insert_mentor(db, values)
+    except DuplicateAccountError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_ACCOUNT_DETAILS[e.field]
+        )
+    logger.info("Created mentor %s", mentor.email)
+    return mentor
+
 @router.post(
     "/login",
     summary="Login",
     description="Login with email and password to get access token. Works for both mentors and admins."
 )
 async def login(
+    _: None = Depends(deps.throttle_login),
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """OAuth2 compatible token login with email/password"""
+    account = await resolve_account_by_email(db, form_data.username)
+
     # First try admin login
-    query = select(User).where(User.email == form_data.username)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
-    
-    if user and verify_password(form_data.password, user.hashed_password):
-        return {
-            "access_token": create_access_token(
-                subject=str(user.id),
-                role=user.role,
-                user_data={
-                    "id": str(user.id),
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "role": user.role
-                },
-                expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            ),
-            "token_type": "bearer"
-        }
+    user = account.admin
+    if user and await _verify_and_rehash(db, user, form_data.password):
+        return await _issue_tokens(db, user.id, user.role, _admin_user_data(user))
     
     # If not admin, try mentor login
-    query = select(Mentor).where(Mentor.email == form_data.username)
-    result = await db.execute(query)
-    mentor = result.scalar_one_or_none()
+    mentor = account.mentor
     
     if not mentor or \
        mentor.auth_provider != AuthProvider.EMAIL or \
-       not verify_password(form_data.password, mentor.hashed_password):
+       not await _verify_and_rehash(db, mentor, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -87,36 +181,55 @@ async def login(
             detail="Account not approved. Please wait for administrator verification."
         )
     
-    return {
-        "access_token": create_access_token(
-            subject=str(mentor.id),
-            role="mentor",
-            user_data={
-                "id": str(mentor.id),
-                "email": mentor.email,
-                "full_name": mentor.full_name,
-                "role": "mentor",
-                "current_role": mentor.current_role,
-                "institution": mentor.institution,
-                "department": mentor.department,
-                "degrees": mentor.degrees,
-                "research_interests": mentor.research_interests,
-                "continent": mentor.continent,
-                "country": mentor.country,
-                "city": mentor.city,
-                "latitude": mentor.latitude,
-                "longitude": mentor.longitude,
-                "profile_picture_url": mentor.profile_picture_url,
-                "linkedin_url": mentor.linkedin_url,
-                "auth_provider": mentor.auth_provider.value,
-                "moderation_status": mentor.moderation_status.value,
-                "created_at": mentor.created_at.isoformat() if mentor.created_at else None,
-                "updated_at": mentor.updated_at.isoformat() if mentor.updated_at else None
-            },
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        ),
-        "token_type": "bearer"
-    }
+    return await _issue_tokens(db, mentor.id, "mentor", _mentor_user_data(mentor))
+
+@router.post(
+    "/refresh",
+    summary="Refresh Access Token",
+    description="Exchange a refresh token for a new access token. The refresh token is rotated and can only be used once."
+)
+async def refresh_access_token(
+    refresh_token: str = Body(..., embed=True),
+    db: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Rotate a refresh token and issue a new access token"""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        record = await rotate_refresh_token(db, refresh_token)
+    except InvalidRefreshToken:
+        raise invalid_token
+    
+    if record.role == "mentor":
+        mentor = await db.get(Mentor, record.subject_id)
+        if not mentor or mentor.moderation_status != ModerationStatus.APPROVED:
+            raise invalid_token
+        user_data = _mentor_user_data(mentor)
+    else:
+        user = await db.get(User, record.subject_id)
+        if not user:
+            raise invalid_token
+        user_data = _admin_user_data(user)
+    
+    return await _issue_tokens(db, record.subject_id, record.role, user_data, record.family_id)
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Logout",
+    description="Revoke a refresh token together with every access token issued from the same login."
+)
+async def logout(
+    refresh_token: str = Body(..., embed=True),
+    db: AsyncSession = Depends(deps.get_db)
+) -> None:
+    """Revoke the refresh token family"""
+    record = await find_refresh_token(db, refresh_token)
+    if record:
+        await revoke_family(db, record.family_id)
 
 @router.post(
     "/register",
@@ -130,32 +243,21 @@ async def register_mentor(
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Register a new mentor"""
-    query = select(Mentor).where(Mentor.email == mentor_in.email)
-    result = await db.execute(query)
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     if not validate_password(mentor_in.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password must be at least 8 characters long and contain at least one number and one special character"
         )
 
-    mentor = Mentor(
+    # bcrypt is CPU bound, keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, mentor_in.password)
+
+    return await _create_mentor(db, {
         **mentor_in.model_dump(exclude={"password"}),
-        hashed_password=get_password_hash(mentor_in.password),
-        auth_provider=AuthProvider.EMAIL,
-        moderation_status=ModerationStatus.PENDING
-    )
-    
-    db.add(mentor)
-    await db.commit()
-    await db.refresh(mentor)
-    
-    return mentor
+        "hashed_password": hashed_password,
+        "auth_provider": AuthProvider.EMAIL,
+        "moderation_status": ModerationStatus.PENDING
+    })
 
 @router.post(
     "/oauth/register",
@@ -169,42 +271,10 @@ async def register_oauth_mentor(
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Register a new mentor with OAuth"""
-    query = select(Mentor).where(Mentor.email == mentor_in.email)
-    result = await db.execute(query)
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    if mentor_in.auth_provider == AuthProvider.GOOGLE:
-        query = select(Mentor).where(Mentor.google_id == mentor_in.google_id)
-        result = await db.execute(query)
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Google account already registered"
-            )
-    
-    if mentor_in.auth_provider == AuthProvider.ORCID:
-        query = select(Mentor).where(Mentor.orcid_id == mentor_in.orcid_id)
-        result = await db.execute(query)
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="ORCID account already registered"
-            )
-    
-    mentor = Mentor(
+    return await _create_mentor(db, {
         **mentor_in.model_dump(),
-        moderation_status=ModerationStatus.PENDING
-    )
-    
-    db.add(mentor)
-    await db.commit()
-    await db.refresh(mentor)
-    
-    return mentor
+        "moderation_status": ModerationStatus.PENDING
+    })
 
 @router.post(
     "/oauth/google/login",
@@ -228,20 +298,17 @@ async def google_login(
             logger.error(f"Google token verification failed: {str(e)}")
             raise
         
-        # First try to find mentor by Google ID
-        query = select(Mentor).where(
-            Mentor.auth_provider == AuthProvider.GOOGLE,
-            Mentor.google_id == google_info['google_id']
+        # Find mentor by Google ID, falling back to email
+        mentor = await resolve_google_account(db, google_info['google_id'], google_info['email'])
+        
+        matched_google_id = (
+            mentor is not None and
+            mentor.auth_provider == AuthProvider.GOOGLE and
+            mentor.google_id == google_info['google_id']
         )
-        result = await db.execute(query)
-        mentor = result.scalar_one_or_none()
         
-        if not mentor:
-            # If not found by Google ID, try to find by email
-            logger.info(f"No mentor found with Google ID, trying email lookup")
-            query = select(Mentor).where(Mentor.email == google_info['email'])
-            result = await db.execute(query)
-            mentor = result.scalar_one_or_none()
+        if not matched_google_id:
+            logger.info(f"No mentor found with Google ID, using email lookup")
             
             if mentor:
                 if mentor.auth_provider == AuthProvider.EMAIL:
@@ -270,40 +337,10 @@ async def google_login(
                 detail="Account not approved. Please wait for administrator verification."
             )
         
-        # Create access token
-        access_token = create_access_token(
-            subject=str(mentor.id),
-            role="mentor",
-            user_data={
-                "id": str(mentor.id),
-                "email": mentor.email,
-                "full_name": mentor.full_name,
-                "role": "mentor",
-                "current_role": mentor.current_role,
-                "institution": mentor.institution,
-                "department": mentor.department,
-                "degrees": mentor.degrees,
-                "research_interests": mentor.research_interests,
-                "continent": mentor.continent,
-                "country": mentor.country,
-                "city": mentor.city,
-                "latitude": mentor.latitude,
-                "longitude": mentor.longitude,
-                "profile_picture_url": mentor.profile_picture_url,
-                "linkedin_url": mentor.linkedin_url,
-                "auth_provider": mentor.auth_provider.value,
-                "moderation_status": mentor.moderation_status.value,
-                "created_at": mentor.created_at.isoformat() if mentor.created_at else None,
-                "updated_at": mentor.updated_at.isoformat() if mentor.updated_at else None
-            },
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
+        tokens = await _issue_tokens(db, mentor.id, "mentor", _mentor_user_data(mentor))
         
         logger.info(f"Successfully logged in mentor: {mentor.email}")
-        return {
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
+        return tokens
         
     except HTTPException:
         raise
@@ -319,7 +356,7 @@ async def google_login(
     summary="ORCID OAuth Login",
     description="Login with ORCID OAuth token"
 )
-def orcid_login(
+async def orcid_login(
     orcid_token: str = Body(..., embed=True),
     db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
@@ -330,7 +367,7 @@ def orcid_login(
         Mentor.auth_provider == AuthProvider.ORCID,
         Mentor.orcid_id == orcid_token
     )
-    result = db.execute(query)
+    result = await db.execute(query)
     mentor = result.scalar_one_or_none()
     
     if not mentor:
@@ -345,33 +382,4 @@ def orcid_login(
             detail="Account not approved. Please wait for administrator verification."
         )
     
-    return {
-        "access_token": create_access_token(
-            subject=str(mentor.id),
-            role="mentor",
-            user_data={
-                "id": str(mentor.id),
-                "email": mentor.email,
-                "full_name": mentor.full_name,
-                "role": "mentor",
-                "current_role": mentor.current_role,
-                "institution": mentor.institution,
-                "department": mentor.department,
-                "degrees": mentor.degrees,
-                "research_interests": mentor.research_interests,
-                "continent": mentor.continent,
-                "country": mentor.country,
-                "city": mentor.city,
-                "latitude": mentor.latitude,
-                "longitude": mentor.longitude,
-                "profile_picture_url": mentor.profile_picture_url,
-                "linkedin_url": mentor.linkedin_url,
-                "auth_provider": mentor.auth_provider.value,
-                "moderation_status": mentor.moderation_status.value,
-                "created_at": mentor.created_at.isoformat() if mentor.created_at else None,
-                "updated_at": mentor.updated_at.isoformat() if mentor.updated_at else None
-            },
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        ),
-        "token_type": "bearer"
-    }
+    return await _issue_tokens(db, mentor.id, "mentor", _mentor_user_data(mentor))
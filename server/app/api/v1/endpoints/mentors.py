@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body
-from typing import List, Optional, Any
-from sqlalchemy import or_, and_, func, select, cast, ARRAY, String, exists
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query, Path, Body
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Hashable, List, Optional, Tuple, Union, Any
+from sqlalchemy import and_, cast, ARRAY, String, exists
 from sqlalchemy.dialects.postgresql import ARRAY as PG_ARRAY
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from uuid import UUID
+import asyncio
 import logging
+import orjson
 
 from app.models.mentor import Mentor
-from app.models.enums import ModerationStatus
 from app.schemas.mentor import (
     MentorProfile,
     SearchResponse,
@@ -16,15 +18,53 @@ from app.schemas.mentor import (
     MentorSearch,
     GlobeVisualization
 )
+from app.core.cache import MISSING, LocalCache
+from app.core.compression import CompressedPayload
+from app.core.config import settings
+from app.core.serialization import partial_model, raw_json_response, render_list, render_object
+from app.db.deadlines import CancelOnDisconnectRoute, is_overload_error, latency_budget, request_deadline
+from app.db.notifications import MENTOR_CHANGED, change_listener
+from app.services import mentors as mentor_queries
+from app.services import public_directory
 from app.api import deps
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/mentors", tags=["Mentors"])
+router = APIRouter(prefix="/mentors", tags=["Mentors"], route_class=CancelOnDisconnectRoute)
+
+def _public_cache(name: str) -> LocalCache:
+    """Per-worker cache of a public read, cleared whenever any mentor changes"""
+    cache = LocalCache(
+        name,
+        max_entries=settings.PUBLIC_CACHE_MAX_ENTRIES,
+        ttl=settings.PUBLIC_CACHE_TTL_SECONDS,
+        settle=settings.DB_READ_MAX_LAG_SECONDS if settings.DATABASE_READ_URL else 0
+    )
+    change_listener.register_cache(cache, MENTOR_CHANGED)
+    return cache
+
+tag_suggestion_cache = _public_cache("tag_suggestions")
+globe_cache = _public_cache("globe")
+
+def _cached_response(cache: LocalCache, key: Hashable, generation: int, body: bytes, request: Request) -> Response:
+    """Cache body read at generation, compressed once per encoding on demand, and respond with it"""
+    payload = CompressedPayload(body)
+    if cache.set(key, payload, generation):
+        return payload.response(request)
+    # Not kept, so not worth compressing harder than CompressionMiddleware does
+    return raw_json_response(body)
+
+def _search_page(items: bytes, total: int, page: int, page_size: int) -> Response:
+    """SearchResponse body around an already rendered items array"""
+    return raw_json_response(
+        b'{"items":' + items
+        + f',"total":{total},"page":{page},"page_size":{page_size}}}'.encode()
+    )
 
 @router.get(
     "/search",
+    dependencies=[Depends(latency_budget(settings.SEARCH_LATENCY_BUDGET_MS))],
     response_model=SearchResponse,
     summary="Search Mentors",
     description="""
@@ -38,91 +78,76 @@ router = APIRouter(prefix="/mentors", tags=["Mentors"])
     """
 )
 async def search_mentors(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     keyword: Optional[str] = Query(None, description="Full-text search term"),
     research_interests: List[str] = Query([], description="Filter by research interest tags"),
     continent: Optional[str] = Query(None, description="Filter by continent"),
     country: Optional[str] = Query(None, description="Filter by country"),
     city: Optional[str] = Query(None, description="Filter by city"),
     page: int = Query(1, description="Page number"),
-    page_size: int = Query(10, description="Results per page")
+    page_size: int = Query(10, description="Results per page"),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_mentor_fields)
 ) -> SearchResponse:
     """Advanced search for mentors with multiple filtering options"""
     try:
-        logger.info(f"Search request - keyword: {keyword}, interests: {research_interests}, location: {continent}/{country}/{city}")
-        
-        # Start with base query
-        query = select(Mentor).where(Mentor.moderation_status == ModerationStatus.APPROVED)
+        logger.info(
+            "Search request - keyword: %s, interests: %s, location: %s/%s/%s",
+            keyword, research_interests, continent, country, city
+        )
         
-        # Full-text search across all relevant fields
-        if keyword:
-            keyword = keyword.strip().lower()
-            logger.debug(f"Applying keyword filter: {keyword}")
-            query = query.where(
-                or_(
-                    func.lower(Mentor.full_name).contains(keyword),
-                    func.lower(Mentor.email).contains(keyword),
-                    func.lower(Mentor.institution).contains(keyword),
-                    func.lower(Mentor.department).contains(keyword),
-                    func.lower(Mentor.current_role).contains(keyword),
-                    func.lower(func.array_to_string(Mentor.research_interests, ' ', '')).contains(keyword),
-                    func.lower(func.array_to_string(Mentor.degrees, ' ', '')).contains(keyword)
-                )
+        if settings.PUBLIC_READ_MODEL_ENABLED:
+            total, items = await public_directory.search_mentors(
+                db,
+                keyword=keyword,
+                research_interests=research_interests,
+                continent=continent,
+                country=country,
+                city=city,
+                page=page,
+                page_size=page_size,
+                fields=fields
             )
+            return _search_page(items, total, page, page_size)
         
-        # Research interest tags filter
-        if research_interests:
-            interests_lower = [interest.lower() for interest in research_interests]
-            logger.debug(f"Applying research interests filter: {interests_lower}")
-            
-            # Use array_to_string for case-insensitive search with OR logic
-            # This returns mentors who have ANY of the specified interests
-            query = query.where(
-                or_(*[
-                    func.lower(func.array_to_string(Mentor.research_interests, ',', '')).like(f'%{interest.lower()}%')
-                    for interest in research_interests
-                ])
+        if settings.DB_JSON_RENDERING_ENABLED:
+            total, items = await mentor_queries.search_approved_mentors_json(
+                db,
+                keyword=keyword,
+                research_interests=research_interests,
+                continent=continent,
+                country=country,
+                city=city,
+                page=page,
+                page_size=page_size,
+                fields=fields
             )
+            return _search_page(items, total, page, page_size)
         
-        # Geographic filters (case-insensitive)
-        if continent:
-            logger.debug(f"Applying continent filter: {continent}")
-            query = query.where(func.lower(Mentor.continent) == continent.lower())
-        if country:
-            logger.debug(f"Applying country filter: {country}")
-            query = query.where(func.lower(Mentor.country) == country.lower())
-        if city:
-            logger.debug(f"Applying city filter: {city}")
-            query = query.where(func.lower(Mentor.city) == city.lower())
-        
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await db.scalar(count_query) or 0
-        logger.debug(f"Total results before pagination: {total}")
-        
-        # Apply pagination
-        query = query.offset((page - 1) * page_size).limit(page_size)
-        
-        # Execute query and get results
-        result = await db.execute(query)
-        mentors = result.scalars().all()
-        
-        # Convert to list and ensure proper serialization
-        mentor_list = list(mentors)
-        logger.info(f"Search completed - found {len(mentor_list)} results (page {page} of {(total + page_size - 1) // page_size})")
-        
-        # Create response with proper typing
-        response = SearchResponse(
-            items=mentor_list,
-            total=total,
+        total, mentor_list = await mentor_queries.search_approved_mentors(
+            db,
+            keyword=keyword,
+            research_interests=research_interests,
+            continent=continent,
+            country=country,
+            city=city,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            fields=fields
         )
         
-        return response
+        logger.info(
+            "Search completed - found %d results (page %d of %d)",
+            len(mentor_list), page, (total + page_size - 1) // page_size
+        )
+        
+        return _search_page(
+            render_list(partial_model(MentorResponse, fields), mentor_list), total, page, page_size
+        )
         
     except Exception as e:
-        logger.error(f"Search error: {str(e)}", exc_info=True)
+        if is_overload_error(e):
+            raise
+        logger.error("Search error: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error performing search: {str(e)}"
@@ -130,31 +155,28 @@ async def search_mentors(
 
 @router.get(
     "/tags/suggest",
+    dependencies=[Depends(latency_budget(settings.MENTOR_LATENCY_BUDGET_MS))],
     response_model=List[str],
     summary="Tag Auto-suggestions",
     description="Get research interest tag suggestions based on partial input"
 )
 async def suggest_tags(
-    db: AsyncSession = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
     prefix: str = Query(..., min_length=1, description="Tag prefix to search for"),
     limit: int = Query(10, le=50, description="Maximum number of suggestions to return")
 ) -> List[str]:
     """Get tag suggestions for auto-complete"""
-    query = select(Mentor.research_interests).where(
-        Mentor.moderation_status == ModerationStatus.APPROVED
-    )
-    result = await db.execute(query)
-    all_tags = result.scalars().all()
-    
-    unique_tags = set(tag.lower() for tags in all_tags for tag in tags)
-    
-    prefix = prefix.lower()
-    matching_tags = [
-        tag for tag in unique_tags 
-        if tag.startswith(prefix)
-    ]
-    
-    return sorted(matching_tags)[:limit]
+    key = (prefix.lower(), limit)
+    payload = tag_suggestion_cache.get(key)
+    if payload is not MISSING:
+        return payload.response(request)
+    generation = tag_suggestion_cache.generation
+    if settings.PUBLIC_READ_MODEL_ENABLED:
+        suggestions = await public_directory.suggest_research_interests(db, prefix, limit)
+    else:
+        suggestions = await mentor_queries.suggest_research_interests(db, prefix, limit)
+    return _cached_response(tag_suggestion_cache, key, generation, orjson.dumps(suggestions), request)
 
 @router.put(
     "/me",
@@ -164,6 +186,7 @@ async def suggest_tags(
 )
 async def update_profile(
     update_data: MentorUpdate,
+    response: Response,
     current_mentor: Mentor = Depends(deps.get_current_mentor),
     db: AsyncSession = Depends(deps.get_db)
 ) -> MentorResponse:
@@ -174,6 +197,7 @@ async def update_profile(
     db.add(current_mentor)
     await db.commit()
     await db.refresh(current_mentor)
+    deps.stick_to_primary(response)
     
     return current_mentor
 
@@ -189,8 +213,70 @@ async def get_own_profile(
     """Get authenticated mentor's profile"""
     return current_mentor
 
+async def _stream_globe(
+    session_maker: async_sessionmaker,
+    research_interests: List[str],
+    fields: Optional[Tuple[str, ...]],
+    cache_key: Hashable,
+    generation: int,
+    deadline: Optional[float]
+) -> AsyncIterator[bytes]:
+    """
+    Globe JSON as Postgres renders it, GLOBE_STREAM_BATCH_SIZE mentors per
+    chunk. Runs after the endpoint has returned and its session is closed,
+    so it opens its own session and carries over the request deadline.
+
+    A reader task fetches the batches as fast as the database returns them
+    and hands them over through a queue, so a slow client never keeps the
+    connection checked out. The complete body is cached unless the cache was
+    cleared since generation; an error mid-stream aborts the response.
+    """
+    request_deadline.set(deadline)
+    # Body chunks, then None when complete or the exception that ended the read
+    chunks: "asyncio.Queue[Union[bytes, Exception, None]]" = asyncio.Queue()
+
+    async def read() -> None:
+        separator = b"["
+        try:
+            async with session_maker() as db:
+                batch = []
+                async for doc in mentor_queries.iter_globe_mentors_json(
+                    db, research_interests, batch_size=settings.GLOBE_STREAM_BATCH_SIZE, fields=fields
+                ):
+                    batch.append(doc)
+                    if len(batch) == settings.GLOBE_STREAM_BATCH_SIZE:
+                        chunks.put_nowait(separator + ",".join(batch).encode())
+                        separator = b","
+                        batch = []
+                if batch:
+                    chunks.put_nowait(separator + ",".join(batch).encode())
+                    separator = b","
+        except Exception as e:
+            chunks.put_nowait(e)
+            return
+        chunks.put_nowait(b"]" if separator == b"," else b"[]")
+        chunks.put_nowait(None)
+
+    # Inherits the request deadline set above
+    reader = asyncio.create_task(read())
+    body = []
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            body.append(chunk)
+            yield chunk
+    finally:
+        # The client went away: stop reading and return the connection
+        reader.cancel()
+    globe_cache.set(cache_key, CompressedPayload(b"".join(body)), generation)
+
 @router.get(
     "/globe",
+    dependencies=[Depends(latency_budget(settings.GLOBE_LATENCY_BUDGET_MS))],
     response_model=List[MentorResponse],
     summary="Globe Data",
     description="""
@@ -200,22 +286,36 @@ async def get_own_profile(
     """
 )
 async def get_globe_data(
-    db: AsyncSession = Depends(deps.get_db),
-    research_interests: List[str] = Query([], description="Filter by research interests")
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
+    session_maker: async_sessionmaker = Depends(deps.get_read_session_maker),
+    research_interests: List[str] = Query([], description="Filter by research interests"),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_mentor_fields)
 ) -> List[MentorResponse]:
     """Get mentor data for globe visualization"""
-    query = select(Mentor).where(Mentor.moderation_status == ModerationStatus.APPROVED)
-    
-    if research_interests:
-        for interest in research_interests:
-            query = query.where(Mentor.research_interests.any(interest))
-    
-    result = await db.execute(query)
-    mentors = result.scalars().all()
-    return mentors
+    # Containment filter, so order and duplicates do not matter
+    key = (settings.PUBLIC_READ_MODEL_ENABLED, tuple(sorted(set(research_interests))), fields)
+    payload = globe_cache.get(key)
+    if payload is not MISSING:
+        return payload.response(request)
+    generation = globe_cache.generation
+    if settings.PUBLIC_READ_MODEL_ENABLED:
+        body = await public_directory.list_globe_mentors(db, research_interests, fields)
+    elif settings.DB_JSON_RENDERING_ENABLED:
+        return StreamingResponse(
+            _stream_globe(session_maker, research_interests, fields, key, generation, request_deadline.get()),
+            media_type="application/json"
+        )
+    else:
+        body = render_list(
+            partial_model(MentorResponse, fields),
+            await mentor_queries.list_globe_mentors(db, research_interests, fields)
+        )
+    return _cached_response(globe_cache, key, generation, body, request)
 
 @router.get(
     "/{mentor_id}",
+    dependencies=[Depends(latency_budget(settings.MENTOR_LATENCY_BUDGET_MS))],
     response_model=MentorResponse,
     summary="Get Mentor",
     description="""
@@ -226,15 +326,20 @@ async def get_globe_data(
 )
 async def get_mentor(
     mentor_id: UUID = Path(..., description="The UUID of the mentor to retrieve"),
-    db: AsyncSession = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_read_db),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_mentor_fields)
 ) -> MentorResponse:
     """Get a specific mentor profile"""
-    query = select(Mentor).where(
-        Mentor.id == mentor_id,
-        Mentor.moderation_status == ModerationStatus.APPROVED
-    )
-    result = await db.execute(query)
-    mentor = result.scalar_one_or_none()
+    if settings.PUBLIC_READ_MODEL_ENABLED:
+        doc = await public_directory.get_mentor(db, mentor_id, fields)
+        if doc is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Mentor not found"
+            )
+        return raw_json_response(doc)
+    
+    mentor = await mentor_queries.get_approved_mentor_by_id(db, mentor_id, fields)
     
     if not mentor:
         raise HTTPException(
@@ -242,4 +347,4 @@ async def get_mentor(
             detail="Mentor not found"
         )
     
-    return mentor
\ No newline at end of file
+    return raw_json_response(render_object(partial_model(MentorResponse, fields), mentor))
\ No newline at end of file
@@ -17,6 +17,8 @@ tags_metadata = [
            - Email/password login (/login)
            - Google OAuth login (/oauth/google/login)
            - ORCID OAuth login (/oauth/orcid/login)
+        4. Exchange the refresh token for new tokens before the access token
+           expires (/refresh), and revoke the session with /logout
         """
     },
     {
@@ -0,0 +1,175 @@
+"""
+Admission control for API requests.
+
+Under a traffic spike every route used to compete for the same database
+connections, and requests queued in the pool for up to DB_POOL_TIMEOUT.
+AdmissionMiddleware admits at most ADMISSION_MAX_CONCURRENCY API requests
+per worker at a time (by default the worker's database pool size plus
+overflow) and sorts each request into a class:
+
+    auth     /auth/*                                  logins and tokens
+    detail   everything else                          profiles, own profile, admin
+    search   /mentors/search, /mentors/tags/*
+    globe    /mentors/globe
+    export   GET /admin/mentors, /admin/mentors/pending (unpaginated lists)
+
+Each class may use a share of the slots, so globe and search can never
+take all of them, and has a short bounded queue with a maximum wait.
+When a slot frees up it goes to the longest waiting request of the
+highest priority class. A request whose class queue is full, or whose
+wait runs out, gets 503 with Retry-After straight away.
+
+Health checks, /metrics and the docs are never held back.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import pool_limits
+
+class AdmissionClass(NamedTuple):
+    priority: int  # lower is served first
+    share: float  # of all slots
+    queue: int  # requests waiting at most
+    max_wait: float  # seconds
+
+CLASSES: Dict[str, AdmissionClass] = {
+    "auth": AdmissionClass(priority=0, share=1.0, queue=64, max_wait=5.0),
+    "detail": AdmissionClass(priority=1, share=1.0, queue=64, max_wait=2.0),
+    "search": AdmissionClass(priority=2, share=0.6, queue=32, max_wait=1.0),
+    "globe": AdmissionClass(priority=3, share=0.3, queue=16, max_wait=1.0),
+    "export": AdmissionClass(priority=4, share=0.1, queue=4, max_wait=0.5)
+}
+
+EXPORT_PATHS = ("/admin/mentors", "/admin/mentors/pending")
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Admission class of a request, or None when it is not controlled"""
+    if not path.startswith(settings.API_V1_STR + "/"):
+        return None
+    path = path[len(settings.API_V1_STR):]
+    if path.startswith("/auth/"):
+        return "auth"
+    if path == "/mentors/search" or path.startswith("/mentors/tags/"):
+        return "search"
+    if path == "/mentors/globe":
+        return "globe"
+    if method == "GET" and path in EXPORT_PATHS:
+        return "export"
+    return "detail"
+
+class AdmissionController:
+    """Slots shared by the classes of one worker, handed out by priority"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.limits = {name: max(1, math.ceil(capacity * cls.share)) for name, cls in CLASSES.items()}
+        self.in_flight = 0
+        self.active: Dict[str, int] = {name: 0 for name in CLASSES}
+        self.waiting: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in CLASSES}
+        # Highest priority first
+        self._order = sorted(CLASSES, key=lambda name: CLASSES[name].priority)
+
+    def _has_room(self, name: str) -> bool:
+        return self.in_flight < self.capacity and self.active[name] < self.limits[name]
+
+    def _admit(self, name: str) -> None:
+        self.in_flight += 1
+        self.active[name] += 1
+
+    def _queued_ahead(self, name: str) -> bool:
+        """Whether a request of this or a higher priority class is waiting and could take a free slot"""
+        priority = CLASSES[name].priority
+        return any(
+            self.waiting[other] and self.active[other] < self.limits[other]
+            for other in self._order
+            if CLASSES[other].priority <= priority
+        )
+
+    async def acquire(self, name: str) -> Optional[str]:
+        """
+        Take a slot for a request of class name.
+
+        Returns:
+            None once admitted, otherwise why not: "queue_full" or "timeout"
+        """
+        if self._has_room(name) and not self._queued_ahead(name):
+            self._admit(name)
+            return None
+        queue = self.waiting[name]
+        if len(queue) >= CLASSES[name].queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, CLASSES[name].max_wait)
+            return None
+        except asyncio.TimeoutError:
+            return "timeout"
+        except asyncio.CancelledError:
+            # Cancelled right after release() handed us the slot
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+
+    def release(self, name: str) -> None:
+        self.in_flight -= 1
+        self.active[name] -= 1
+        for other in self._order:
+            queue = self.waiting[other]
+            while queue and self._has_room(other):
+                waiter = queue.popleft()
+                # Skip waiters that timed out or were cancelled meanwhile
+                if not waiter.done():
+                    self._admit(other)
+                    waiter.set_result(None)
+            if self.in_flight >= self.capacity:
+                return
+
+def _default_capacity() -> int:
+    pool_size, max_overflow = pool_limits()
+    return pool_size + max_overflow
+
+class AdmissionMiddleware:
+    """Holds back or sheds API requests over their class's limits, see the module docstring"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.controller = AdmissionController(settings.ADMISSION_MAX_CONCURRENCY or _default_capacity())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        refused = await self.controller.acquire(name)
+        if settings.METRICS_ENABLED:
+            metrics.ADMISSION_WAIT.labels(name).observe(time.perf_counter() - start)
+        if refused is not None:
+            if settings.METRICS_ENABLED:
+                metrics.ADMISSION_REJECTED.labels(name, refused).inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "The server is busy. Please try again shortly."},
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
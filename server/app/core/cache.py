@@ -0,0 +1,79 @@
+"""
+Small in-process caches for public read results.
+
+Each worker keeps its own copies, so a cache is only trustworthy while the
+worker hears about writes made by the others. Caches are registered with
+the change listener (app/db/notifications.py), which clears them when a
+relevant notification arrives and disables them while it is not subscribed.
+Disabled caches report every lookup as a miss and store nothing.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+MISSING = object()
+
+class LocalCache:
+    """
+    LRU cache with a per-entry time to live.
+
+    A result is only stored if no clear happened while it was being read:
+    callers take the generation before querying and pass it to set. For
+    settle seconds after a clear nothing is stored either, so results read
+    from a replica that has not yet replayed the change are not cached.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, settle: float = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.settle = settle
+        self.enabled = False
+        self._cleared_at = 0.0
+        self.generation = 0  # bumped by every clear
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        entry = self._entries.get(key) if self.enabled else None
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int) -> bool:
+        """
+        Store value unless disabled, settling or cleared since generation.
+        Returns whether it was stored.
+        """
+        now = time.monotonic()
+        if not self.enabled or generation != self.generation or now - self._cleared_at < self.settle:
+            return False
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def clear(self, _payload: Optional[Dict[str, Any]] = None) -> None:
+        """Drop every entry. Usable directly as a notification handler."""
+        self._entries.clear()
+        self._cleared_at = time.monotonic()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
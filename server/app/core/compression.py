@@ -0,0 +1,191 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses API responses with brotli or gzip,
+whichever the client prefers in Accept-Encoding (brotli on a tie), when
+the body is at least COMPRESSION_MIN_SIZE bytes and of a text type.
+Streamed responses are compressed chunk by chunk. Responses that already
+carry a Content-Encoding are passed through untouched.
+
+Cached public payloads (the globe, tag suggestions) are kept as
+CompressedPayload, which compresses each encoding once, at a higher
+level, on first use. The caches are cleared on every mentor change, so
+that is once per revision rather than once per request.
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional
+
+import brotli
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# In order of preference
+ENCODINGS = ("br", "gzip")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Precompressed payloads are compressed once per revision and can afford more
+PRECOMPRESSED_BROTLI_QUALITY = 9
+PRECOMPRESSED_GZIP_LEVEL = 9
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The supported encoding the client prefers, or None for identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body: bytes, encoding: str, precompressed: bool = False) -> bytes:
+    if encoding == "br":
+        quality = PRECOMPRESSED_BROTLI_QUALITY if precompressed else settings.COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    level = PRECOMPRESSED_GZIP_LEVEL if precompressed else settings.COMPRESSION_GZIP_LEVEL
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def is_compressible(headers: Headers) -> bool:
+    return (
+        "content-encoding" not in headers
+        and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+    )
+
+class CompressedPayload:
+    """A cacheable response body with its encodings, each compressed on first use"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding, precompressed=True)
+        return self._encoded[encoding]
+
+    def response(self, request: Request) -> Response:
+        encoding = None
+        if settings.COMPRESSION_ENABLED and len(self.body) >= settings.COMPRESSION_MIN_SIZE:
+            encoding = negotiate(request.headers.get("accept-encoding", ""))
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded(encoding), media_type=self.media_type, headers=headers)
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if last else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+class _CompressingResponder:
+    """
+    Wraps send for one response. Body chunks are held back until
+    minimum_size bytes or the end of the body arrive, so small responses
+    stay uncompressed even when streamed (as BaseHTTPMiddleware does).
+    """
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.buffered: List[bytes] = []
+        self.size = 0
+        self.decided = False
+        self.compressor: Optional[_StreamCompressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.decided:
+            await self._forward(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+        if not is_compressible(headers):
+            self.decided = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        self.buffered.append(body)
+        self.size += len(body)
+        if more_body and self.size < self.minimum_size:
+            return
+
+        self.decided = True
+        body = b"".join(self.buffered)
+        self.buffered = []
+        if self.size < self.minimum_size:
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(self.encoding)
+            message = self._compressed_chunk(body, more_body)
+        else:
+            body = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+            message = {"type": "http.response.body", "body": body}
+        await self.send(self.start)
+        await self.send(message)
+
+    async def _forward(self, message: Message) -> None:
+        if self.compressor is not None and message["type"] == "http.response.body":
+            message = self._compressed_chunk(message.get("body", b""), message.get("more_body", False))
+        await self.send(message)
+
+    def _compressed_chunk(self, body: bytes, more_body: bool) -> Message:
+        return {
+            "type": "http.response.body",
+            "body": self.compressor.chunk(body, last=not more_body),
+            "more_body": more_body
+        }
+
+class CompressionMiddleware:
+    """Compresses eligible HTTP responses, see the module docstring"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+            if encoding is not None:
+                send = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, send)
@@ -1,5 +1,5 @@
-from typing import Any, Dict, List, Optional, Union
-from pydantic import AnyHttpUrl, EmailStr, field_validator, Field, ValidationInfo
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import AnyHttpUrl, EmailStr, confloat, field_validator, Field, ValidationInfo
 from pydantic_settings import BaseSettings
 import secrets
 
@@ -17,12 +17,37 @@ class Settings(BaseSettings):
     SQL_LOG_LEVEL: str = "WARNING" 
     LOG_FORMAT: str = "%(levelname)s: %(message)s"
     LOG_DATE_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+    LOG_JSON: bool = False  # one JSON object per record instead of LOG_FORMAT
+    LOG_QUEUE_SIZE: int = Field(default=10000, gt=0)  # records waiting to be written, more are dropped
+    LOG_SAMPLE_RATES: Dict[str, confloat(ge=0, le=1)] = Field(
+        default_factory=dict,
+        description='Fraction of DEBUG/INFO records kept per logger, e.g. {"app.core.middleware": 0.1}'
+    )
     
     # Security
     SECRET_KEY: str = Field(..., description="Secret key for JWT token generation")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
-    
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=30, gt=0)
+    REFRESH_REUSE_GRACE_SECONDS: float = Field(default=10, ge=0)  # reuse of a just rotated token is not theft yet
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)  # see scripts/calibrate_bcrypt.py
+
+    # Login throttling (token buckets keyed by client IP and by account and client IP)
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_IP_BURST: int = Field(default=20, gt=0)
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = Field(default=10, gt=0)
+    LOGIN_RATE_LIMIT_ACCOUNT_BURST: int = Field(default=5, gt=0)
+    LOGIN_RATE_LIMIT_ACCOUNT_PER_MINUTE: float = Field(default=1, gt=0)
+    LOGIN_RATE_LIMIT_STORE_PATH: Optional[str] = Field(
+        None,
+        description="SQLite file shared by all workers on the host. Per-process buckets when unset."
+    )
+
+    # Token revocation (per-worker Bloom filter of revoked refresh token families)
+    REVOCATION_FILTER_CAPACITY: int = Field(default=10000, gt=0)
+    REVOCATION_FILTER_ERROR_RATE: float = Field(default=0.001, gt=0, lt=1)
+    REVOCATION_SYNC_INTERVAL_SECONDS: int = Field(default=30, gt=0)
+
     # Admin
     ADMIN_EMAIL: EmailStr
     ADMIN_KEY: str
@@ -34,12 +59,122 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: Optional[str] = None
     POSTGRES_DB: Optional[str] = None
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    # Read replica (public read endpoints use the primary when unset)
+    DATABASE_READ_URL: Optional[str] = None
+    DB_READ_STICKY_SECONDS: int = Field(default=10, ge=0)  # read own writes from the primary
+    DB_READ_MAX_LAG_SECONDS: float = Field(default=5, gt=0)
+    DB_READ_LAG_CHECK_INTERVAL_SECONDS: float = Field(default=5, gt=0)
     
+    # Latency budgets of public reads, applied as statement_timeout (0 disables)
+    SEARCH_LATENCY_BUDGET_MS: int = Field(default=3000, ge=0)
+    GLOBE_LATENCY_BUDGET_MS: int = Field(default=5000, ge=0)
+    MENTOR_LATENCY_BUDGET_MS: int = Field(default=1000, ge=0)  # profile and tag suggestions
+
+    # Per-request query counts and timings (see app/db/instrumentation.py)
+    QUERY_STATS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    QUERY_REPEAT_WARN_THRESHOLD: int = Field(default=10, gt=0)  # same statement per request, likely N+1
+
+    # Slow query log (see app/db/slow_queries.py), needs QUERY_STATS_ENABLED
+    SLOW_QUERY_THRESHOLD_MS: int = Field(default=250, gt=0)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = Field(default=0.1, ge=0, le=1)
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = Field(default=5000, gt=0)
+    SLOW_QUERY_LOG_SIZE: int = Field(default=50, gt=0)
+
+    # Cross-worker cache invalidation over LISTEN/NOTIFY (see app/db/notifications.py)
+    CHANGE_NOTIFICATIONS_ENABLED: bool = True
+    CHANGE_LISTENER_KEEPALIVE_SECONDS: float = Field(default=30, gt=0)
+    PUBLIC_CACHE_TTL_SECONDS: float = Field(default=300, gt=0)
+    PUBLIC_CACHE_MAX_ENTRIES: int = Field(default=256, gt=0)
+
+    # Serve public directory reads from the trigger-maintained mentor_public table
+    PUBLIC_READ_MODEL_ENABLED: bool = False
+
+    # Response compression (see app/core/compression.py)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = Field(default=1024, ge=0)  # bytes
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=4, ge=0, le=11)
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6, ge=1, le=9)
+
+    # Prometheus metrics at /metrics (see app/core/metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = Field(
+        None,
+        description="Bearer token scrapers must send. Required outside development, open when unset there."
+    )
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = Field(default=1, gt=0)  # pools, caches and event loop lag
+
+    # Per-request CPU profiles for admins (see app/core/profiling.py)
+    PROFILING_ENABLED: bool = True
+    PROFILE_SAMPLE_RATE: float = Field(default=0, ge=0, le=1)  # API requests profiled without asking
+    PROFILE_INTERVAL_MS: float = Field(default=1, gt=0)  # CPU time between samples
+    PROFILE_BUFFER_SIZE: int = Field(default=20, gt=0)  # profiles kept
+    PROFILE_DIR: Optional[str] = Field(
+        None,
+        description="Directory where all workers on the host keep profiles. Per-process memory when unset."
+    )
+
+    # Admission control and load shedding for API requests (see app/core/admission.py)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: Optional[int] = Field(None, gt=0)  # per worker, default DB pool size plus overflow
+    ADMISSION_RETRY_AFTER_SECONDS: int = Field(default=5, gt=0)
+
+    # Worker memory (see app/core/memory.py)
+    MEMORY_RSS_LIMIT_MB: Optional[int] = Field(
+        None,
+        gt=0,
+        description="RSS at which a gunicorn worker drains its requests and is replaced. Off when unset."
+    )
+    MEMORY_CHECK_INTERVAL_SECONDS: float = Field(default=30, gt=0)
+    MEMORY_TRACE_FRAMES: int = Field(default=0, ge=0)  # trace allocations from startup, 0 leaves tracemalloc off
+
+    # Render mentor lists from database rows without re-validating them (see app/core/serialization.py)
+    TRUSTED_SERIALIZATION_ENABLED: bool = False
+
+    # Have Postgres render search pages and the globe as JSON (see app/services/mentors.py)
+    DB_JSON_RENDERING_ENABLED: bool = False
+    GLOBE_STREAM_BATCH_SIZE: int = Field(default=500, gt=0)  # rows per streamed chunk
+
+    # Schema handling at startup (see app/db/schema.py). Use verify in production.
+    SCHEMA_STARTUP_MODE: Literal["create_all", "verify", "skip"] = "create_all"
+
     # Database Pool Settings
     DB_POOL_SIZE: int = Field(default=20, gt=0)
     DB_MAX_OVERFLOW: int = Field(default=10, ge=0)
     DB_POOL_TIMEOUT: int = Field(default=30, gt=0)  # seconds
     DB_POOL_RECYCLE: int = Field(default=1800, gt=0)  # 30 minutes
+    DB_CONNECTION_BUDGET: int = Field(
+        default=90,
+        gt=0,
+        description="Connections all workers may open to the primary, split across WEB_CONCURRENCY workers. "
+        "The default leaves headroom under Postgres's default max_connections of 100."
+    )
+    DB_READ_CONNECTION_BUDGET: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Same for the read replica, a separate server. DB_CONNECTION_BUDGET when unset."
+    )
+    WEB_CONCURRENCY: Optional[int] = Field(None, gt=0)  # exported by gunicorn_conf.py
+    DB_POOL_WAIT_WARN_MS: int = Field(default=500, gt=0)
+    DB_POOL_WARN_INTERVAL_SECONDS: int = Field(default=60, gt=0)
+
+    # Statement caching
+    DB_QUERY_CACHE_SIZE: int = Field(default=1200, ge=0)  # compiled SQL per engine
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+        default=500,
+        ge=0,
+        description="asyncpg prepared statements per connection. Set to 0 behind pgbouncer in transaction mode."
+    )
+
+    @field_validator("METRICS_TOKEN")
+    @classmethod
+    def require_metrics_token(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
+        # /metrics is served on the public port and reveals routes, latencies and pool state
+        data = info.data
+        if not v and data.get("METRICS_ENABLED") and data.get("ENVIRONMENT") != "development":
+            raise ValueError("METRICS_TOKEN is required when METRICS_ENABLED is set outside development")
+        return v
 
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     @classmethod
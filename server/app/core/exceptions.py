@@ -0,0 +1,3 @@
+class DeadlineExceeded(Exception):
+    """Raised when a request has used up its latency budget"""
+    pass
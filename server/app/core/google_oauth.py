@@ -1,8 +1,6 @@
 """
 Google OAuth verification utilities.
 """
-from google.oauth2 import id_token
-from google.auth.transport.requests import Request
 from typing import Dict, Any
 from fastapi import HTTPException, status
 import time
@@ -41,6 +39,11 @@ def verify_google_token(token: str) -> Dict[str, Any]:
     Raises:
         HTTPException: If token is invalid or verification fails
     """
+    # google-auth pulls in requests and its crypto backends, so it is only
+    # loaded once someone actually signs in with Google
+    from google.oauth2 import id_token
+    from google.auth.transport.requests import Request
+
     try:
         # Validate configuration first
         validate_google_configuration()
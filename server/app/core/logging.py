@@ -0,0 +1,134 @@
+"""
+Non-blocking log pipeline.
+
+configure_logging gives the root logger a single QueueHandler. Records are
+put on a bounded queue and a QueueListener thread formats and writes them
+to stderr, so request handling never waits on the stream:
+
+- Messages use %-style arguments. A record that is filtered out, sampled
+  out or below the logger's level is never interpolated.
+- When the queue is full, records are dropped and counted rather than
+  waited on (log_records_dropped_total in the metrics).
+- LOG_SAMPLE_RATES keeps a fraction of the DEBUG and INFO records of a
+  logger and its children, e.g. {"app.core.middleware": 0.1}. Warnings
+  and errors are always kept.
+- With LOG_JSON, each record is written as a JSON object by
+  python-json-logger, including fields passed with extra=.
+
+Threads do not survive fork, so a forked child (a gunicorn worker of a
+preloaded app) gets a new queue and listener of its own.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from pythonjsonlogger import jsonlogger
+
+from app.core.config import settings
+
+JSON_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+class SamplingFilter(logging.Filter):
+    """Keeps rates[logger] of DEBUG and INFO records, for the closest configured logger"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def rate(self, name: str) -> Optional[float]:
+        if name not in self._resolved:
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + ".")]
+            self._resolved[name] = self.rates[max(matches, key=len)] if matches else None
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rate(record.name)
+        return rate is None or random.random() < rate
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when its queue is full instead of blocking"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stdlib formats here, in the logging thread, so that records can
+        # be pickled. This queue stays in the process, so leave the message,
+        # arguments and exc_info to the listener's handler.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_JSON:
+        return jsonlogger.JsonFormatter(JSON_FORMAT, datefmt=settings.LOG_DATE_FORMAT)
+    return logging.Formatter(settings.LOG_FORMAT, datefmt=settings.LOG_DATE_FORMAT)
+
+class _Pipeline:
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(settings.LOG_QUEUE_SIZE)
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(_formatter())
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+        root = logging.getLogger()
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, settings.LOG_LEVEL))
+
+        self.handler = handler
+        self.listener = QueueListener(log_queue, stream, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Write out what is queued and stop the listener"""
+        if self.listener is not None:
+            try:
+                self.listener.stop()
+            except queue.Full:
+                # No room for the stop sentinel. The thread is a daemon, so just leave it.
+                pass
+            self.listener = None
+
+    def restart_after_fork(self) -> None:
+        # The parent's listener thread is gone and its queue may be mid-operation
+        if self.listener is not None:
+            self.listener = None
+            self.start()
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped if self.handler is not None else 0
+
+_pipeline = _Pipeline()
+
+def configure_logging() -> None:
+    """Route all logging through the queue. Safe to call more than once."""
+    _pipeline.stop()
+    _pipeline.start()
+
+def dropped_records() -> int:
+    """Records dropped by this process because the queue was full"""
+    return _pipeline.dropped
+
+atexit.register(_pipeline.stop)
+os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
@@ -0,0 +1,173 @@
+"""
+Worker memory instrumentation and recycling.
+
+- rss_bytes reads this process's resident set size from /proc, and the
+  sampler in app/core/metrics.py exports it per worker.
+- MemoryTracer wraps tracemalloc for GET /admin/stats/memory/allocations,
+  which lists the allocation sites that grew most since a baseline.
+  Tracing slows allocation down, so it is off unless MEMORY_TRACE_FRAMES
+  is set or an admin turns it on (PUT /admin/stats/memory/tracing), and is
+  per worker like the other admin stats.
+- rss_watchdog runs in every worker. Under gunicorn, a worker whose RSS
+  passes MEMORY_RSS_LIMIT_MB sends itself SIGTERM: uvicorn stops
+  accepting connections, finishes the requests in flight and exits, and
+  the master starts a fresh worker. Outside gunicorn nothing would
+  replace the process, so the limit is only logged.
+
+gunicorn_conf.py also recycles workers after MAX_REQUESTS requests, plus
+up to MAX_REQUESTS_JITTER so workers do not restart together.
+"""
+import asyncio
+import logging
+import os
+import random
+import resource
+import signal
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_started_at = time.monotonic()
+
+def _reset_started_at() -> None:
+    global _started_at
+    _started_at = time.monotonic()
+
+# Preloaded apps are imported in the gunicorn master, before the fork
+os.register_at_fork(after_in_child=_reset_started_at)
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def under_gunicorn() -> bool:
+    """Whether a gunicorn master will replace this process when it exits"""
+    return "gunicorn.arbiter" in sys.modules
+
+class MemoryTracer:
+    """tracemalloc with a baseline snapshot to compare against"""
+
+    # Allocations made by tracemalloc and the import system are not ours
+    IGNORED = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    )
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        """(Re)start tracing with frames of traceback per allocation and take a baseline"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+        logger.info("Tracing allocations with %d frames", frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._baseline = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self.IGNORED)
+
+    def top_growth(self, limit: int, group_by: str, reset: bool = False) -> List[Dict[str, Any]]:
+        """
+        Allocation sites that grew most since the baseline, largest first.
+
+        Args:
+            limit: Number of sites to return
+            group_by: lineno, filename or traceback
+            reset: Make this snapshot the new baseline
+        """
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self._baseline, group_by)
+        if reset:
+            self._baseline = snapshot
+        return [
+            {
+                "location": [str(frame) for frame in stat.traceback],
+                "size_kb": stat.size / 1024,
+                "size_diff_kb": stat.size_diff / 1024,
+                "count": stat.count,
+                "count_diff": stat.count_diff
+            }
+            for stat in stats[:limit]
+        ]
+
+memory_tracer = MemoryTracer()
+
+def memory_stats() -> Dict[str, Any]:
+    """Memory of this worker"""
+    rss = rss_bytes()
+    traced, traced_peak = tracemalloc.get_traced_memory()
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": time.monotonic() - _started_at,
+        "rss_mb": rss / MB if rss is not None else None,
+        "peak_rss_mb": peak_rss_bytes() / MB,
+        "rss_limit_mb": settings.MEMORY_RSS_LIMIT_MB,
+        "recycles_on_limit": bool(settings.MEMORY_RSS_LIMIT_MB) and under_gunicorn(),
+        "tracing": memory_tracer.tracing,
+        "trace_frames": tracemalloc.get_traceback_limit() if memory_tracer.tracing else 0,
+        "traced_mb": traced / MB,
+        "traced_peak_mb": traced_peak / MB
+    }
+
+async def rss_watchdog() -> None:
+    """Recycle this worker once its RSS passes MEMORY_RSS_LIMIT_MB (see the module docstring)"""
+    limit = settings.MEMORY_RSS_LIMIT_MB
+    if not limit or rss_bytes() is None:
+        return
+    startup_rss = rss_bytes() / MB
+    if startup_rss >= limit:
+        # Every replacement would be recycled again right away
+        logger.error(
+            "MEMORY_RSS_LIMIT_MB (%d) is below the RSS of a fresh worker (%.0f MB), ignoring it", limit, startup_rss
+        )
+        return
+    recycle = under_gunicorn()
+    if not recycle:
+        logger.warning("MEMORY_RSS_LIMIT_MB only recycles gunicorn workers, RSS will just be logged")
+
+    interval = settings.MEMORY_CHECK_INTERVAL_SECONDS
+    # Spread the checks of workers started together
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        rss = rss_bytes() / MB
+        if rss > limit:
+            if not recycle:
+                logger.warning("RSS %.0f MB is above MEMORY_RSS_LIMIT_MB (%d)", rss, limit)
+            else:
+                logger.warning(
+                    "RSS %.0f MB is above MEMORY_RSS_LIMIT_MB (%d), recycling worker %d", rss, limit, os.getpid()
+                )
+                # Graceful: uvicorn drains open requests before exiting
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+        await asyncio.sleep(interval)
@@ -0,0 +1,202 @@
+"""
+Prometheus metrics, served at /metrics.
+
+RequestMiddleware records every HTTP request:
+
+- http_requests_total{method, route, status}
+- http_request_duration_seconds{method, route}, a histogram up to the
+  end of the response body
+- http_requests_in_progress{method}
+
+route is the route template, e.g. /api/v1/mentors/{mentor_id}, or
+"unmatched", and unknown methods count as OTHER, so the label sets stay
+bounded.
+
+sample_loop runs in every worker and, every METRICS_SAMPLE_INTERVAL_SECONDS,
+measures how late its sleep wakes up (event_loop_lag_seconds) and copies
+the connection pool, cache and dropped log record counters kept elsewhere
+into metrics, along with each worker's RSS. Cache
+hit ratios are left to the query, e.g.
+
+    sum by (cache) (rate(cache_lookups_total{result="hit"}[5m]))
+      / sum by (cache) (rate(cache_lookups_total[5m]))
+
+Under gunicorn each worker writes its values to PROMETHEUS_MULTIPROC_DIR
+(set up in gunicorn_conf.py) and a scrape of any worker reports the sum
+over all of them. When a worker exits, the master folds its counters and
+histograms into shared totals and deletes its files. Without it, e.g. under plain uvicorn, the one process
+reports its own values.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Hashable, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+from app.core.config import settings
+from app.core.logging import dropped_records
+from app.core.memory import rss_bytes
+from app.db.notifications import change_listener
+from app.db.session import engine, read_engine
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to the end of the response body",
+    ["method", "route"]
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+    multiprocess_mode="livesum"
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop runs a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state",
+    ["engine", "state"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity",
+    "Most connections the pools may open, pool_size plus max_overflow",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connection checkouts", ["engine"])
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT",
+    ["engine"]
+)
+DB_POOL_CHECKOUT_WAIT = Counter(
+    "db_pool_checkout_wait_seconds_total",
+    "Time spent waiting for connections",
+    ["engine"]
+)
+
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time API requests waited for an admission slot",
+    ["class"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "API requests shed with 503, by class and reason (queue_full or timeout)",
+    ["class", "reason"]
+)
+
+WORKER_RSS = Gauge(
+    "worker_resident_memory_bytes",
+    "Resident memory of each worker",
+    multiprocess_mode="liveall"
+)
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "In-process cache lookups", ["cache", "result"])
+CACHE_INVALIDATIONS = Counter("cache_invalidations_total", "In-process cache clears", ["cache"])
+CACHE_ENTRIES = Gauge("cache_entries", "In-process cache entries", ["cache"], multiprocess_mode="livesum")
+
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+def method_label(method: str) -> str:
+    return method if method in HTTP_METHODS else "OTHER"
+
+def _multiprocess_dir() -> str:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+
+def render() -> Tuple[bytes, str]:
+    """Exposition text of all metrics, and its content type"""
+    if not _multiprocess_dir():
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    # Reads every worker's files, so build it per scrape
+    for attempt in range(3):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        try:
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        except FileNotFoundError:
+            # The files of an exited worker were folded away during the read (see gunicorn_conf.py)
+            if attempt == 2:
+                raise
+
+class _CounterSync:
+    """Advances counters to running totals kept by other objects"""
+
+    def __init__(self):
+        self._last: Dict[Hashable, float] = {}
+
+    def sync(self, counter: Counter, total: float, *labels: str) -> None:
+        key = (counter, labels)
+        last = self._last.get(key, 0.0)
+        # Totals restart from zero when a pool is recreated
+        increase = total - last if total >= last else total
+        if increase:
+            (counter.labels(*labels) if labels else counter).inc(increase)
+        self._last[key] = total
+
+def _sample_pools(counters: _CounterSync) -> None:
+    engines = {"primary": engine, "replica": read_engine}
+    for name, instance in engines.items():
+        if instance is None:
+            continue
+        pool = instance.pool
+        DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+        DB_POOL_CAPACITY.labels(name).set(pool.size() + pool._max_overflow)
+        counters.sync(DB_POOL_CHECKOUTS, pool.checkouts, name)
+        counters.sync(DB_POOL_CHECKOUT_TIMEOUTS, pool.timeouts, name)
+        counters.sync(DB_POOL_CHECKOUT_WAIT, pool.total_wait, name)
+
+def _sample_caches(counters: _CounterSync) -> None:
+    for cache in change_listener.caches:
+        stats = cache.stats()
+        CACHE_ENTRIES.labels(cache.name).set(stats["entries"])
+        counters.sync(CACHE_LOOKUPS, stats["hits"], cache.name, "hit")
+        counters.sync(CACHE_LOOKUPS, stats["misses"], cache.name, "miss")
+        counters.sync(CACHE_INVALIDATIONS, stats["invalidations"], cache.name)
+
+def _sample(counters: _CounterSync) -> None:
+    _sample_pools(counters)
+    _sample_caches(counters)
+    counters.sync(LOG_RECORDS_DROPPED, dropped_records())
+    rss = rss_bytes()
+    if rss is not None:
+        WORKER_RSS.set(rss)
+
+async def sample_loop() -> None:
+    """Record event loop lag, pool and cache metrics until cancelled"""
+    interval = settings.METRICS_SAMPLE_INTERVAL_SECONDS
+    counters = _CounterSync()
+    try:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+            _sample(counters)
+    finally:
+        # Flush what this worker counted since the last sample
+        _sample(counters)
@@ -0,0 +1,105 @@
+"""
+Request logging, error logging and query statistics as one ASGI middleware.
+
+These used to be three @app.middleware("http") functions. Each of those is
+a BaseHTTPMiddleware that runs the rest of the app in a separate task and
+re-streams the response body through a memory stream, on every request.
+RequestMiddleware only wraps send:
+
+- API requests get a QueryStats in current_query_stats. When the response
+  starts, the totals go to the per-route stats and, with
+  SERVER_TIMING_ENABLED, into a Server-Timing header.
+- API responses are logged as before: status >= 400 as a warning with the
+  duration, others at info level when DEBUG is set. Docs, the OpenAPI
+  schema and static files are not logged.
+- Unhandled exceptions are logged and re-raised.
+- With METRICS_ENABLED, every HTTP request, API or not, is counted and
+  timed in the Prometheus metrics (app/core/metrics.py).
+"""
+import logging
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.instrumentation import QueryStats, current_query_stats, finish_request
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SKIP_LOG_SUFFIXES = (".js", ".css", ".ico")
+
+class RequestMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.skip_log_paths = {"/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json"}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope.get("root_path", "") + scope["path"]
+        is_api = path.startswith(settings.API_V1_STR)
+        log = is_api and path not in self.skip_log_paths and not path.endswith(SKIP_LOG_SUFFIXES)
+        stats = QueryStats(f"{method} {path}") if is_api and settings.QUERY_STATS_ENABLED else None
+        status_code: Optional[int] = None
+        start = time.perf_counter()
+
+        async def send_with_stats(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if stats is not None:
+                    # Set by the router on the shared scope
+                    route = scope.get("route")
+                    server_timing = finish_request(
+                        f"{method} {route.path if route else 'unmatched'}",
+                        stats,
+                        time.perf_counter() - start
+                    )
+                    if settings.SERVER_TIMING_ENABLED:
+                        MutableHeaders(scope=message).append("Server-Timing", server_timing)
+            await send(message)
+
+        token = current_query_stats.set(stats) if stats is not None else None
+        if settings.METRICS_ENABLED:
+            metrics.REQUESTS_IN_PROGRESS.labels(metrics.method_label(method)).inc()
+        try:
+            await self.app(scope, receive, send_with_stats)
+        except Exception as e:
+            logger.error("%s %s | Error: %s", method, path, e, extra={"method": method, "path": path})
+            raise
+        finally:
+            if token is not None:
+                current_query_stats.reset(token)
+            if settings.METRICS_ENABLED:
+                self._record(scope, method, status_code, time.perf_counter() - start)
+
+        if not log or status_code is None:
+            return
+        duration = time.perf_counter() - start
+        fields = {
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 1)
+        }
+        if status_code >= 400:
+            logger.warning("%s %s | Status: %d | Duration: %.2fs", method, path, status_code, duration, extra=fields)
+        elif settings.DEBUG:
+            logger.info("%s %s | Status: %d", method, path, status_code, extra=fields)
+
+    @staticmethod
+    def _record(scope: Scope, method: str, status_code: Optional[int], duration: float) -> None:
+        route = scope.get("route")
+        template = route.path if route else "unmatched"
+        method = metrics.method_label(method)
+        metrics.REQUESTS_IN_PROGRESS.labels(method).dec()
+        # No response started, so ServerErrorMiddleware answers with a 500
+        metrics.REQUESTS.labels(method, template, str(status_code or 500)).inc()
+        metrics.REQUEST_DURATION.labels(method, template).observe(duration)
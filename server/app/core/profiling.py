@@ -0,0 +1,314 @@
+"""
+On-demand statistical profiling of single requests.
+
+A request is profiled when an admin sends an X-Profile header (checked
+with deps.verify_admin), or at random for PROFILE_SAMPLE_RATE of API
+requests. The response then carries X-Profile-Id, and the last
+PROFILE_BUFFER_SIZE profiles are served by GET /admin/profiles as
+collapsed stacks (flamegraph.pl, speedscope) or speedscope JSON. They are
+kept in process memory, or with PROFILE_DIR in a directory shared by all
+workers on the host, so any worker can serve any profile. gunicorn_conf.py
+sets PROFILE_DIR.
+
+Sampling uses a SIGPROF interval timer, so it only runs while a profiled
+request is in flight and costs nothing otherwise. The signal handler runs
+on the event loop thread in the context of whatever it interrupted. A
+context variable set for the profiled request, and inherited by the tasks
+it starts, decides whether a sample belongs to it. Samples measure CPU
+time every PROFILE_INTERVAL_MS. Time spent waiting, e.g. on the database,
+does not appear; see Server-Timing for that.
+
+Needs setitimer (not on Windows) and an event loop on the main thread,
+as under uvicorn and gunicorn. Elsewhere requests are never profiled.
+"""
+import logging
+import os
+import random
+import re
+import signal
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.deps import verify_admin
+from app.core.config import settings
+from app.db.session import AsyncSessionMaker
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_ID = re.compile(r"[0-9a-f]{16}")
+
+@lru_cache(maxsize=4096)
+def frame_label(code: CodeType) -> str:
+    """e.g. search_mentors (app/api/v1/endpoints/mentors.py:80)"""
+    filename = code.co_filename
+    marker = filename.rfind("site-packages" + os.sep)
+    if marker >= 0:
+        filename = filename[marker + len("site-packages") + 1:]
+    elif filename.startswith(os.getcwd() + os.sep):
+        filename = os.path.relpath(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    # ; separates frames in collapsed stacks
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+class RequestProfile:
+    """CPU samples of one request, as counts per distinct stack"""
+
+    def __init__(self, method: str, path: str, trigger: str, interval: float):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval = interval
+        self.status: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.stacks: Counter = Counter()
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sum(self.stacks.values())
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration * 1000,
+            "cpu_ms": samples * self.interval * 1000,
+            "samples": samples
+        }
+
+    def collapsed(self) -> str:
+        """One "root;...;leaf count" line per distinct stack"""
+        lines = [
+            f"{';'.join(frame_label(code) for code in stack)} {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Sampled profile in speedscope's file format, weighted in milliseconds"""
+        frames: List[Dict[str, Any]] = []
+        indexes: Dict[CodeType, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            for code in stack:
+                if code not in indexes:
+                    indexes[code] = len(frames)
+                    frames.append({"name": frame_label(code), "file": code.co_filename, "line": code.co_firstlineno})
+            samples.append([indexes[code] for code in stack])
+            weights.append(count * self.interval * 1000)
+        name = f"{self.method} {self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": settings.PROJECT_NAME,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+    def export(self) -> Dict[str, Any]:
+        """What a profile store keeps: the summary and both output formats"""
+        return {"summary": self.summary(), "collapsed": self.collapsed(), "speedscope": self.speedscope()}
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def _on_sample(signum: int, frame: Optional[FrameType]) -> None:
+    profile = current_profile.get()
+    if profile is None:
+        return
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    stack.reverse()
+    profile.stacks[tuple(stack)] += 1
+
+class MemoryProfileStore:
+    """The last size exported profiles of this process"""
+    backend = "memory"
+
+    def __init__(self, size: int):
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        self._profiles.append(profile)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        """Summaries, newest first"""
+        return [profile["summary"] for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return next((profile for profile in self._profiles if profile["summary"]["id"] == profile_id), None)
+
+class DirectoryProfileStore:
+    """
+    The last size exported profiles of all processes sharing a directory,
+    one JSON file each. Blocking, so call it from the threadpool.
+    """
+    backend = "directory"
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        os.makedirs(path, exist_ok=True)
+
+    def _files(self) -> List[str]:
+        """Profile files, newest first"""
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                try:
+                    entries.append((os.stat(os.path.join(self.path, name)).st_mtime, name))
+                except FileNotFoundError:
+                    pass
+        return [os.path.join(self.path, name) for _, name in sorted(entries, reverse=True)]
+
+    def _read(self, file: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(file, "rb") as f:
+                return orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            # Pruned by another worker meanwhile
+            return None
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        file = os.path.join(self.path, f"{profile['summary']['id']}.json")
+        # Written whole, then renamed, so readers never see part of it
+        with open(f"{file}.{os.getpid()}.tmp", "wb") as f:
+            f.write(orjson.dumps(profile))
+        os.replace(f"{file}.{os.getpid()}.tmp", file)
+        for old in self._files()[self.size:]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def recent(self) -> List[Dict[str, Any]]:
+        profiles = (self._read(file) for file in self._files()[:self.size])
+        return [profile["summary"] for profile in profiles if profile is not None]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not PROFILE_ID.fullmatch(profile_id):
+            return None
+        return self._read(os.path.join(self.path, f"{profile_id}.json"))
+
+class Profiler:
+    """Runs the SIGPROF timer while profiles are active and keeps the finished ones"""
+
+    def __init__(self, store):
+        self.store = store
+        self._active = 0
+
+    @property
+    def available(self) -> bool:
+        return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+    @contextmanager
+    def run(self, profile: RequestProfile) -> Iterator[RequestProfile]:
+        """Sample the current task, and the tasks it starts, into profile"""
+        if self._active == 0:
+            signal.signal(signal.SIGPROF, _on_sample)
+            signal.setitimer(signal.ITIMER_PROF, profile.interval, profile.interval)
+        self._active += 1
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile.duration = time.perf_counter() - start
+            current_profile.reset(token)
+            self._active -= 1
+            if self._active == 0:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+
+    def keep(self, profile: RequestProfile) -> None:
+        """Export a finished profile to the store. Blocking with a directory store."""
+        self.store.add(profile.export())
+
+def _build_store(path: Optional[str]):
+    if path:
+        return DirectoryProfileStore(path, settings.PROFILE_BUFFER_SIZE)
+    return MemoryProfileStore(settings.PROFILE_BUFFER_SIZE)
+
+profiler = Profiler(_build_store(settings.PROFILE_DIR))
+
+async def _is_admin(headers: Headers) -> bool:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        async with AsyncSessionMaker() as db:
+            return await verify_admin(db, token)
+    except HTTPException:
+        return False
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it or are sampled, see the module docstring"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def _trigger(self, scope: Scope) -> Optional[str]:
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER in headers:
+            if await _is_admin(headers):
+                return "header"
+            logger.info("Ignoring %s header of a non-admin request to %s", PROFILE_HEADER, scope["path"])
+        if (
+            settings.PROFILE_SAMPLE_RATE
+            and scope["path"].startswith(settings.API_V1_STR)
+            and random.random() < settings.PROFILE_SAMPLE_RATE
+        ):
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.available:
+            await self.app(scope, receive, send)
+            return
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger, settings.PROFILE_INTERVAL_MS / 1000)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        try:
+            with profiler.run(profile):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            # The response is complete, so the client does not wait for this
+            await run_in_threadpool(profiler.keep, profile)
@@ -0,0 +1,194 @@
+"""
+Token-bucket rate limiting for authentication endpoints.
+
+Buckets live in process memory by default. When LOGIN_RATE_LIMIT_STORE_PATH
+is set, they are kept in a local SQLite file instead so that every gunicorn
+worker on the host draws from the same buckets.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class MemoryBucketStore:
+    """
+    Per-process token buckets, evicting the least recently used keys
+    once max_keys is reached.
+    """
+    backend = "memory"
+
+    def __init__(self, max_keys: int = 50000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        # Takes run in the threadpool
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        """
+        Take one token from the bucket for key.
+
+        Returns:
+            0 if the token was granted, otherwise the number of seconds
+            until a token becomes available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class SQLiteBucketStore:
+    """
+    Token buckets shared by all worker processes on one host through a
+    local SQLite file. Each take is a single short IMMEDIATE transaction.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path: str, prune_after: float = 3600):
+        self.path = path
+        self.prune_after = prune_after
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so key them by pid.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_second)
+
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            if now - self._last_prune > self.prune_after:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.prune_after,))
+                self._last_prune = now
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM buckets").fetchone()[0]
+
+class RateLimiter:
+    """
+    Named token-bucket rules over a shared bucket store.
+
+    Each rule is (burst capacity, tokens refilled per minute). Counters are
+    kept per worker process.
+    """
+
+    def __init__(self, store, rules: Dict[str, Tuple[float, float]], enabled: bool = True):
+        self.store = store
+        self.rules = rules
+        self.enabled = enabled
+        self.counters: Counter = Counter()
+
+    def hit(self, rule: str, key: str) -> float:
+        """
+        Consume one token for key under rule.
+
+        Returns:
+            0 if allowed, otherwise the suggested Retry-After in seconds
+        """
+        if not self.enabled:
+            return 0.0
+
+        capacity, per_minute = self.rules[rule]
+        try:
+            retry_after = self.store.take(f"{rule}:{key}", capacity, per_minute / 60.0)
+        except sqlite3.Error as e:
+            # Never lock users out because the shared store is unavailable
+            logger.error("Rate limit store error: %s", e)
+            self.counters["store_errors"] += 1
+            return 0.0
+
+        if retry_after:
+            self.counters[f"throttled_{rule}"] += 1
+        return retry_after
+
+    def check(self, keys: Dict[str, str]) -> float:
+        """
+        Apply rules in order, stopping at the first one that throttles so a
+        rejected request does not also drain the later buckets.
+        """
+        for rule, key in keys.items():
+            retry_after = self.hit(rule, key)
+            if retry_after:
+                return retry_after
+        self.counters["allowed"] += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.store.backend,
+            "tracked_keys": len(self.store),
+            "allowed": self.counters["allowed"],
+            "throttled_ip": self.counters["throttled_ip"],
+            "throttled_account": self.counters["throttled_account"],
+            "store_errors": self.counters["store_errors"],
+        }
+
+def _build_store(path: Optional[str]):
+    if path:
+        return SQLiteBucketStore(path)
+    return MemoryBucketStore()
+
+login_limiter = RateLimiter(
+    store=_build_store(settings.LOGIN_RATE_LIMIT_STORE_PATH),
+    rules={
+        "ip": (settings.LOGIN_RATE_LIMIT_IP_BURST, settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE),
+        "account": (settings.LOGIN_RATE_LIMIT_ACCOUNT_BURST, settings.LOGIN_RATE_LIMIT_ACCOUNT_PER_MINUTE),
+    },
+    enabled=settings.LOGIN_RATE_LIMIT_ENABLED
+)
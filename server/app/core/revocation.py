@@ -0,0 +1,87 @@
+"""
+In-process revocation filter for access tokens.
+
+Each worker keeps a Bloom filter of revoked refresh token families. Checking
+an access token costs a few hash probes and no database round trip; only a
+positive answer, which may be a false positive, is confirmed against the
+database. Revocations made by other workers arrive as token_revoked
+notifications; the filter is also rebuilt from the database on a timer in
+case a notification was missed.
+"""
+import hashlib
+import math
+import time
+from typing import Dict, Iterable
+
+from app.core.config import settings
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationFilter:
+    """
+    Revoked token families known to this worker.
+
+    Families revoked locally are remembered for a while so that a rebuild
+    from a snapshot taken before their commit does not drop them.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, local_ttl: float = 300):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.local_ttl = local_ttl
+        self._filter = BloomFilter(capacity, error_rate)
+        self._local: Dict[str, float] = {}
+        self.size = 0
+        self.synced_at = None
+
+    def add(self, family_id: str) -> None:
+        family_id = str(family_id)
+        self._filter.add(family_id)
+        self._local[family_id] = time.monotonic()
+        self.size += 1
+
+    def might_be_revoked(self, family_id: str) -> bool:
+        return str(family_id) in self._filter
+
+    def rebuild(self, family_ids: Iterable[str]) -> None:
+        """Replace the filter with the given revoked families"""
+        family_ids = [str(family_id) for family_id in family_ids]
+        now = time.monotonic()
+        self._local = {
+            family_id: added for family_id, added in self._local.items()
+            if now - added < self.local_ttl
+        }
+
+        bloom = BloomFilter(max(self.capacity, 2 * len(family_ids)), self.error_rate)
+        for family_id in family_ids:
+            bloom.add(family_id)
+        for family_id in self._local:
+            bloom.add(family_id)
+
+        self._filter = bloom
+        self.size = len(family_ids)
+        self.synced_at = time.time()
+
+revocation_filter = RevocationFilter(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE
+)
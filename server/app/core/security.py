@@ -1,13 +1,36 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+import hashlib
+import secrets
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose and passlib are imported on first use to keep worker startup fast
+
+class InvalidTokenError(Exception):
+    """Raised when an access token cannot be decoded or verified"""
+    pass
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    # Pinning min/max to the configured cost makes passlib flag hashes made at any
+    # other cost as needing an update, so login can rehash them transparently.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+    )
 
 def create_access_token(
-    subject: Union[str, Any], role: str, user_data: dict, expires_delta: timedelta = None
+    subject: Union[str, Any],
+    role: str,
+    user_data: dict,
+    expires_delta: timedelta = None,
+    family_id: Optional[str] = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -22,7 +45,12 @@ def create_access_token(
         "role": role,
         "user": user_data
     }
+    if family_id:
+        # Refresh token family the access token was minted from, used for revocation
+        to_encode["fam"] = str(family_id)
     
+    from jose import jwt
+
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -31,11 +59,50 @@ def create_access_token(
     
     return encoded_jwt
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify an access token.
+    
+    Raises:
+        InvalidTokenError: if the signature, expiry or format is invalid
+    """
+    from jose import jwt, JWTError
+
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError as e:
+        raise InvalidTokenError(str(e)) from e
+
+def create_refresh_token() -> Tuple[str, str]:
+    """
+    Generate an opaque refresh token.
+    
+    Returns:
+        (token, token_hash) - only the hash is stored in the database
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a replacement hash when the stored one was
+    made with a different bcrypt cost than BCRYPT_ROUNDS.
+    
+    Returns:
+        (valid, new_hash) where new_hash is None if no rehash is needed
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def validate_password(password: str) -> bool:
     """
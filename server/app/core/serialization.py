@@ -0,0 +1,77 @@
+"""
+Fast JSON rendering for list endpoints.
+
+Returning ORM objects from an endpoint with a response_model makes FastAPI
+validate every object into the model, dump it back to Python primitives
+and encode those with json.dumps. List endpoints instead render their body
+here and return it with raw_json_response, keeping response_model for the
+OpenAPI schema only:
+
+- render_list validates through a cached TypeAdapter and serializes
+  straight to JSON bytes in pydantic-core.
+- With TRUSTED_SERIALIZATION_ENABLED, objects loaded from our own database
+  are not validated again. Their fields are read in model field order and
+  encoded with orjson, giving the same bytes as the validated path for data
+  that passed validation when it was written.
+
+Sparse fieldsets (?fields=) render through partial_model, a copy of the
+response model restricted to the requested fields, built once per set.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from uuid import UUID
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+from app.core.config import settings
+
+# Bounded, since every sparse fieldset derives a new model
+@lru_cache(maxsize=512)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter for tp, built once per type"""
+    return TypeAdapter(tp)
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], fields: Optional[Tuple[str, ...]]) -> Type[BaseModel]:
+    """model restricted to fields (all of them when None), e.g. MentorResponse[id,full_name]"""
+    if fields is None:
+        return model
+    return create_model(
+        f"{model.__name__}[{','.join(fields)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+@lru_cache(maxsize=512)
+def _field_names(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(model.model_fields)
+
+def trusted_dump(model: Type[BaseModel], objects: Iterable[Any]) -> List[Dict[str, Any]]:
+    """model's fields of each object, read as attributes without validation"""
+    names = _field_names(model)
+    return [{name: getattr(obj, name) for name in names} for obj in objects]
+
+def _default(value: Any) -> Any:
+    # asyncpg returns its own UUID subclass, which orjson does not handle
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def render_list(model: Type[BaseModel], objects: Iterable[Any]) -> bytes:
+    """JSON array of objects (ORM instances or models) as model"""
+    if settings.TRUSTED_SERIALIZATION_ENABLED:
+        # OPT_UTC_Z writes UTC offsets as Z, like pydantic
+        return orjson.dumps(trusted_dump(model, objects), default=_default, option=orjson.OPT_UTC_Z)
+    adapter = type_adapter(List[model])
+    return adapter.dump_json(adapter.validate_python(list(objects), from_attributes=True))
+
+def render_object(model: Type[BaseModel], obj: Any) -> bytes:
+    """JSON object of obj (an ORM instance or model) as model"""
+    # Strip the brackets of a one element array
+    return render_list(model, [obj])[1:-1]
+
+def raw_json_response(body: bytes) -> Response:
+    """Response for a body that is already JSON"""
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,103 @@
+"""
+Per-request latency budgets.
+
+Routes declare a budget with the latency_budget dependency. The resulting
+deadline is kept in a context variable, and every transaction a session
+begins while serving the request gets the time left as
+SET LOCAL statement_timeout, so Postgres cancels a runaway query instead of
+letting it hold a pooled connection. A transaction starting after the
+deadline raises DeadlineExceeded without touching the database.
+
+Routes using CancelOnDisconnectRoute also stop when the client goes away:
+the endpoint task is cancelled, which makes asyncpg cancel the query in
+flight, and the session is closed as usual.
+
+main.py maps DeadlineExceeded and statement timeouts to 504 and pool
+checkout timeouts to 503.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Postgres query_canceled, raised by statement_timeout
+QUERY_CANCELED = "57014"
+
+# Status for requests abandoned by the client, as logged by nginx. Never sent.
+CLIENT_CLOSED_REQUEST = 499
+
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+def latency_budget(budget_ms: int) -> Callable:
+    """Dependency giving the request budget_ms to finish. 0 means no budget."""
+    async def set_deadline() -> None:
+        if budget_ms:
+            request_deadline.set(time.monotonic() + budget_ms / 1000)
+    return set_deadline
+
+@event.listens_for(Session, "after_begin")
+def _apply_deadline(session, transaction, connection) -> None:
+    deadline = request_deadline.get()
+    if deadline is None or connection.dialect.name != "postgresql":
+        return
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise DeadlineExceeded()
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+def is_statement_timeout(error: Exception) -> bool:
+    return isinstance(error, exc.DBAPIError) and getattr(error.orig, "sqlstate", None) == QUERY_CANCELED
+
+def is_overload_error(error: Exception) -> bool:
+    """Errors main.py turns into 503/504 rather than 500"""
+    return isinstance(error, (DeadlineExceeded, exc.TimeoutError)) or is_statement_timeout(error)
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+class CancelOnDisconnectRoute(APIRoute):
+    """
+    Cancels GET endpoints whose client disconnects before the response is
+    ready. Other methods may be reading the body and are left alone.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD"):
+                return await handler(request)
+
+            handler_task = asyncio.ensure_future(handler(request))
+            disconnect_task = asyncio.ensure_future(_wait_for_disconnect(request))
+            try:
+                await asyncio.wait({handler_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                handler_task.cancel()
+                raise
+            finally:
+                disconnect_task.cancel()
+            if handler_task.done():
+                return handler_task.result()
+
+            handler_task.cancel()
+            try:
+                await handler_task
+            except asyncio.CancelledError:
+                pass
+            logger.info("Client disconnected, cancelled %s %s", request.method, request.url.path)
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+        return route_handler
@@ -0,0 +1,157 @@
+"""
+Per-request database query statistics.
+
+Cursor events on the engines time every statement and add it to the
+QueryStats of the current request, found through a context variable set by
+the request middleware in main.py. Statements run outside a request, e.g.
+by background tasks, are not counted. Statements slower than
+SLOW_QUERY_THRESHOLD_MS, in a request or not, go to the slow query log
+(app/db/slow_queries.py).
+
+At the end of a request the middleware reports the totals in a
+Server-Timing header and adds them to per-route aggregates, served by
+GET /admin/stats/queries. A request that runs the same statement shape
+more than QUERY_REPEAT_WARN_THRESHOLD times is logged as a likely N+1.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.slow_queries import slow_query_log
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bind parameters and literals, so statements differing only in values match
+_PARAMETERS = re.compile(r"\$\d+|%\(\w+\)s|\b\d+\b|'(?:[^']|'')*'")
+_PARAMETER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+def statement_shape(statement: str) -> str:
+    """Statement with values replaced, e.g. IN ($1, $2) becomes IN (?)"""
+    return _PARAMETER_LISTS.sub("?", _PARAMETERS.sub("?", statement))
+
+class QueryStats:
+    """Statements run while serving one request"""
+
+    def __init__(self, request: Optional[str] = None):
+        self.request = request
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[str]:
+        """Statement shapes run more than threshold times"""
+        return [shape for shape, count in self.shapes.items() if count > threshold]
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+# DSN to run EXPLAIN against, per instrumented engine
+_explain_dsns: Dict[Engine, Optional[str]] = {}
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS and not executemany:
+        slow_query_log.record(
+            _explain_dsns.get(conn.engine),
+            statement,
+            parameters,
+            duration,
+            stats.request if stats is not None else None
+        )
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument(engine: Engine, explain_dsn: Optional[str] = None) -> None:
+    """
+    Count and time statements run through engine (a sync Engine).
+    Sampled slow SELECTs are explained on a new connection to explain_dsn.
+    """
+    _explain_dsns[engine] = explain_dsn
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+class RouteQueryStats:
+    """Query totals per route template for this worker"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, route: str, stats: QueryStats) -> None:
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time": 0.0,
+                "max_db_time": 0.0,
+                "repeated_statement_requests": 0
+            }
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["db_time"] += stats.duration
+        entry["max_db_time"] = max(entry["max_db_time"], stats.duration)
+        if stats.repeated(settings.QUERY_REPEAT_WARN_THRESHOLD):
+            entry["repeated_statement_requests"] += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-route averages and maxima, busiest routes first"""
+        rows = [
+            {
+                "route": route,
+                "requests": entry["requests"],
+                "queries": entry["queries"],
+                "avg_queries": entry["queries"] / entry["requests"],
+                "max_queries": entry["max_queries"],
+                "avg_db_ms": entry["db_time"] * 1000 / entry["requests"],
+                "max_db_ms": entry["max_db_time"] * 1000,
+                "repeated_statement_requests": entry["repeated_statement_requests"]
+            }
+            for route, entry in self._routes.items()
+        ]
+        return sorted(rows, key=lambda row: row["requests"] * row["avg_db_ms"], reverse=True)
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+route_query_stats = RouteQueryStats()
+
+def finish_request(route: str, stats: QueryStats, duration: float) -> str:
+    """
+    Record a finished request and warn about repeated statements.
+
+    Returns:
+        The Server-Timing header value
+    """
+    route_query_stats.add(route, stats)
+    for shape in stats.repeated(settings.QUERY_REPEAT_WARN_THRESHOLD):
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times - %s", route, stats.shapes[shape], shape[:200]
+        )
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"app;dur={duration * 1000:.1f}"
+    )
@@ -0,0 +1,241 @@
+"""
+Change notifications over Postgres LISTEN/NOTIFY.
+
+Row triggers publish committed writes:
+
+- mentor_changed: {"id", "revision", "op"} for every insert, update or
+  delete on mentors that public reads can see: the row is or was approved
+  and one of its PUBLIC_COLUMNS changed. revision comes from
+  mentor_change_seq, so it only grows and identifies the latest change a
+  worker has seen.
+- token_revoked: {"family_id"} when a refresh token is revoked.
+
+NOTIFY is transactional: listeners hear about a change only after it
+commits, and never about a rolled back one.
+
+Each worker runs one ChangeListener (started in main.lifespan) on a
+dedicated connection to the primary and fans notifications out to the
+handlers subscribed to each channel. Handlers are called with None when
+notifications may have been missed, i.e. after (re)connecting. Registered
+caches are only enabled while the listener is connected and the triggers
+are installed.
+
+Migrations 9e4c2d7f1b68 and 3c7a9e2f5d14 install the triggers. For databases created with
+SCHEMA_STARTUP_MODE=create_all they are installed when create_all creates
+the tables.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import DDL, event
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.db.session import async_database_url, asyncpg_dsn
+from app.models.auth import RefreshToken
+from app.models.mentor import PUBLIC_UPDATE_OF, PUBLIC_UPDATE_WHEN, Mentor
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MENTOR_CHANGED = "mentor_changed"
+TOKEN_REVOKED = "token_revoked"
+
+MENTOR_CHANGE_SEQUENCE = "CREATE SEQUENCE IF NOT EXISTS mentor_change_seq"
+
+MENTOR_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_notify_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('mentor_changed', json_build_object(
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        'revision', nextval('mentor_change_seq'),
+        'op', lower(TG_OP)
+    )::text);
+    RETURN NULL;
+END
+$$
+"""
+
+MENTOR_NOTIFY_INSERT_TRIGGER = """
+CREATE TRIGGER mentor_notify_insert
+AFTER INSERT ON mentors
+FOR EACH ROW WHEN (NEW.moderation_status = 'APPROVED')
+EXECUTE FUNCTION mentor_notify_change()
+"""
+
+MENTOR_NOTIFY_TRIGGER = f"""
+CREATE TRIGGER mentor_notify_change
+AFTER UPDATE OF {PUBLIC_UPDATE_OF} ON mentors
+FOR EACH ROW WHEN ({PUBLIC_UPDATE_WHEN})
+EXECUTE FUNCTION mentor_notify_change()
+"""
+
+MENTOR_NOTIFY_DELETE_TRIGGER = """
+CREATE TRIGGER mentor_notify_delete
+AFTER DELETE ON mentors
+FOR EACH ROW WHEN (OLD.moderation_status = 'APPROVED')
+EXECUTE FUNCTION mentor_notify_change()
+"""
+
+TOKEN_NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION refresh_token_notify_revoked() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('token_revoked', json_build_object('family_id', NEW.family_id)::text);
+    RETURN NULL;
+END
+$$
+"""
+
+# Identical notifications within a transaction are delivered once, so
+# revoking a whole family sends a single event
+TOKEN_NOTIFY_TRIGGER = """
+CREATE TRIGGER refresh_token_notify_revoked
+AFTER UPDATE OF revoked_at ON refresh_tokens
+FOR EACH ROW WHEN (OLD.revoked_at IS NULL AND NEW.revoked_at IS NOT NULL)
+EXECUTE FUNCTION refresh_token_notify_revoked()
+"""
+
+TRIGGER_NAMES = ["mentor_notify_insert", "mentor_notify_change", "mentor_notify_delete", "refresh_token_notify_revoked"]
+
+TRIGGER_CHECK = "SELECT count(*) FROM pg_trigger WHERE tgname = ANY($1::text[]) AND NOT tgisinternal"
+
+for table, statements in (
+    (Mentor.__table__, [
+        MENTOR_CHANGE_SEQUENCE,
+        MENTOR_NOTIFY_FUNCTION,
+        MENTOR_NOTIFY_INSERT_TRIGGER,
+        MENTOR_NOTIFY_TRIGGER,
+        MENTOR_NOTIFY_DELETE_TRIGGER
+    ]),
+    (RefreshToken.__table__, [TOKEN_NOTIFY_FUNCTION, TOKEN_NOTIFY_TRIGGER]),
+):
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+Handler = Callable[[Optional[Dict[str, Any]]], None]
+
+class ChangeListener:
+    """
+    Keeps a LISTEN connection open and dispatches notifications.
+
+    The connection is checked every CHANGE_LISTENER_KEEPALIVE_SECONDS and
+    reopened with exponential backoff when it fails.
+    """
+
+    def __init__(self, dsn: Optional[str]):
+        self.dsn = dsn
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._caches: List[LocalCache] = []
+        self.connected = False
+        self.triggers_installed = False
+        self.revision = 0
+        self.events = 0
+        self.disconnects = 0
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call handler for every notification on channel. Register before run()."""
+        self._handlers[channel].append(handler)
+
+    @property
+    def caches(self) -> List[LocalCache]:
+        return list(self._caches)
+
+    def register_cache(self, cache: LocalCache, *channels: str) -> None:
+        """Clear cache on any notification on channels"""
+        self._caches.append(cache)
+        for channel in channels:
+            self.subscribe(channel, cache.clear)
+
+    def reset(self) -> None:
+        """Start over disconnected, e.g. in a forked worker, with caches cleared and disabled"""
+        self.connected = False
+        self.triggers_installed = False
+        self._resync(ready=False)
+
+    def _call(self, channel: str, payload: Optional[Dict[str, Any]]) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception(f"Handler for {channel} notification failed")
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        self.events += 1
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {channel} notification: {payload}")
+            return
+        self.revision = max(self.revision, int(data.get("revision") or 0))
+        self._call(channel, data)
+
+    def _resync(self, ready: bool) -> None:
+        """Tell every handler that events may have been missed"""
+        for cache in self._caches:
+            cache.enabled = False
+        for channel in list(self._handlers):
+            self._call(channel, None)
+        for cache in self._caches:
+            cache.enabled = ready
+
+    async def _listen(self, conn) -> None:
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        for channel in self._handlers:
+            await conn.add_listener(channel, self._dispatch)
+
+        self.triggers_installed = await conn.fetchval(TRIGGER_CHECK, TRIGGER_NAMES) == len(TRIGGER_NAMES)
+        if not self.triggers_installed:
+            logger.warning("Change notification triggers are missing, caches stay disabled. Run `alembic upgrade head`.")
+        self.connected = True
+        self._resync(ready=self.triggers_installed)
+        logger.info(f"Listening for {', '.join(self._handlers)} notifications")
+
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=settings.CHANGE_LISTENER_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(conn.fetchval("SELECT 1"), timeout=10)
+        logger.warning("Change listener connection closed")
+
+    async def run(self) -> None:
+        import asyncpg
+
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn, timeout=10)
+                delay = 1
+                await self._listen(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Change listener failed: {e}")
+            finally:
+                if self.connected:
+                    self.disconnects += 1
+                self.connected = False
+                self._resync(ready=False)
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.dsn is not None and settings.CHANGE_NOTIFICATIONS_ENABLED,
+            "connected": self.connected,
+            "triggers_installed": self.triggers_installed,
+            "revision": self.revision,
+            "events": self.events,
+            "disconnects": self.disconnects,
+            "caches": [cache.stats() for cache in self._caches]
+        }
+
+change_listener = ChangeListener(asyncpg_dsn(async_database_url))
@@ -0,0 +1,115 @@
+"""
+Trigger maintenance of the mentor_public read model.
+
+mentor_public_sync(id) upserts the projection of one mentor when it is
+approved and deletes it otherwise. Row triggers on mentors call it after
+inserting an approved mentor and after updates that change a public column
+of a row that is or was approved, so approving, rejecting or editing a
+profile refreshes the read model in the same transaction; deleting a
+mentor cascades through the foreign key.
+
+Migrations 5b1f0c7e9a43 and 3c7a9e2f5d14 install the same objects. For databases created
+with SCHEMA_STARTUP_MODE=create_all they are installed, and existing
+approved mentors backfilled, right after create_all creates the table.
+"""
+from sqlalchemy import DDL, event
+
+from app.models.mentor import PUBLIC_UPDATE_OF, PUBLIC_UPDATE_WHEN, MentorPublic
+
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_public_sync(mentor_id uuid) RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO mentor_public (
+        id, full_name, research_interests, search_key, interests_key,
+        continent_key, country_key, city_key, doc, refreshed_at
+    )
+    SELECT
+        m.id,
+        m.full_name,
+        m.research_interests,
+        lower(concat_ws(chr(31),
+            m.full_name, m.email, m.institution, m.department, m.current_role,
+            array_to_string(m.research_interests, ' ', ''),
+            array_to_string(m.degrees, ' ', '')
+        )),
+        lower(array_to_string(m.research_interests, ',', '')),
+        lower(m.continent),
+        lower(m.country),
+        lower(m.city),
+        jsonb_build_object(
+            'id', m.id,
+            'full_name', m.full_name,
+            'email', m.email,
+            'current_role', m.current_role,
+            'institution', m.institution,
+            'department', m.department,
+            'degrees', m.degrees,
+            'research_interests', m.research_interests,
+            'continent', m.continent,
+            'country', m.country,
+            'city', m.city,
+            'latitude', m.latitude,
+            'longitude', m.longitude,
+            'linkedin_url', m.linkedin_url,
+            'profile_picture_url', m.profile_picture_url,
+            'auth_provider', lower(m.auth_provider::text),
+            'moderation_status', lower(m.moderation_status::text),
+            'created_at', m.created_at,
+            'updated_at', m.updated_at
+        ),
+        now()
+    FROM mentors m
+    WHERE m.id = mentor_id AND m.moderation_status = 'APPROVED'
+    ON CONFLICT (id) DO UPDATE SET
+        full_name = EXCLUDED.full_name,
+        research_interests = EXCLUDED.research_interests,
+        search_key = EXCLUDED.search_key,
+        interests_key = EXCLUDED.interests_key,
+        continent_key = EXCLUDED.continent_key,
+        country_key = EXCLUDED.country_key,
+        city_key = EXCLUDED.city_key,
+        doc = EXCLUDED.doc,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    IF NOT FOUND THEN
+        DELETE FROM mentor_public WHERE id = mentor_id;
+    END IF;
+END
+$$
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION mentor_public_refresh() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM mentor_public_sync(NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+CREATE_INSERT_TRIGGER = """
+CREATE TRIGGER mentor_public_insert
+AFTER INSERT ON mentors
+FOR EACH ROW WHEN (NEW.moderation_status = 'APPROVED')
+EXECUTE FUNCTION mentor_public_refresh()
+"""
+
+CREATE_TRIGGER = f"""
+CREATE TRIGGER mentor_public_refresh
+AFTER UPDATE OF {PUBLIC_UPDATE_OF} ON mentors
+FOR EACH ROW WHEN ({PUBLIC_UPDATE_WHEN})
+EXECUTE FUNCTION mentor_public_refresh()
+"""
+
+BACKFILL = "SELECT mentor_public_sync(id) FROM mentors WHERE moderation_status = 'APPROVED'"
+
+INSTALL = [SYNC_FUNCTION, TRIGGER_FUNCTION, CREATE_INSERT_TRIGGER, CREATE_TRIGGER, BACKFILL]
+
+for statement in INSTALL:
+    event.listen(
+        MentorPublic.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql")
+    )
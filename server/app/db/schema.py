@@ -0,0 +1,97 @@
+"""
+Schema preparation at startup.
+
+SCHEMA_STARTUP_MODE decides what happens before the app serves requests:
+
+- create_all: create missing tables from the models (development default)
+- verify: check that the database is at the Alembic head revision
+- skip: do nothing
+
+Under gunicorn the check runs once in the master (see gunicorn_conf.py),
+which sets SCHEMA_PREPARED_ENV so workers start without touching the
+database.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.models.base import Base
+# Imported so their tables are registered on Base.metadata
+from app.models import auth, mentor  # noqa: F401
+# Install their triggers when create_all creates the tables
+from app.db import notifications, read_model  # noqa: F401
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SCHEMA_PREPARED_ENV = "BAMN_SCHEMA_PREPARED"
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised when the database is not at the revision the code expects"""
+    pass
+
+def expected_revisions() -> Set[str]:
+    """Head revisions of the Alembic migration scripts"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+async def current_revisions(engine: AsyncEngine) -> Optional[Set[str]]:
+    """Revisions recorded in alembic_version, or None if it does not exist"""
+    async with engine.connect() as conn:
+        has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version"))
+        if not has_table:
+            return None
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        return set(result.scalars().all())
+
+async def verify_schema(engine: AsyncEngine) -> None:
+    expected = expected_revisions()
+    current = await current_revisions(engine)
+    if current != expected:
+        raise SchemaOutOfDate(
+            f"Database is at revision {sorted(current) if current else 'none'}, "
+            f"expected {sorted(expected)}. Run `alembic upgrade head`."
+        )
+    logger.info(f"Database schema at revision {', '.join(sorted(current))}")
+
+async def create_schema(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def prepare_schema(engine: AsyncEngine) -> None:
+    """Run SCHEMA_STARTUP_MODE unless another process already did"""
+    if os.environ.get(SCHEMA_PREPARED_ENV):
+        return
+
+    mode = settings.SCHEMA_STARTUP_MODE
+    if mode == "create_all":
+        await create_schema(engine)
+    elif mode == "verify":
+        await verify_schema(engine)
+
+async def prepare_schema_once() -> None:
+    """
+    Prepare the schema on a throwaway engine and mark it done for child
+    processes. Used by the gunicorn master before workers are forked, so no
+    pooled connection outlives the fork.
+    """
+    from app.db.session import async_database_url
+
+    engine = create_async_engine(async_database_url, poolclass=NullPool)
+    try:
+        await prepare_schema(engine)
+    finally:
+        await engine.dispose()
+    os.environ[SCHEMA_PREPARED_ENV] = "1"
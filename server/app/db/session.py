@@ -1,23 +1,147 @@
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, Dict, Optional, Tuple
 from app.core.config import settings
+from app.db.instrumentation import instrument
+import asyncio
 import logging
+import time
 
 sql_logger = logging.getLogger('sqlalchemy.engine')
 sql_logger.setLevel(getattr(logging, settings.SQL_LOG_LEVEL))
 
-# Use asyncpg driver for PostgreSQL
-async_database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-
-engine = create_async_engine(
-    async_database_url,
-    pool_pre_ping=True,
-    pool_size=20, 
-    max_overflow=10, 
-    pool_timeout=30,
-    pool_recycle=1800, 
-    echo=False,
-    future=True 
-)
+logger = logging.getLogger(__name__)
+
+def to_async_url(url: str) -> str:
+    """Use asyncpg driver for PostgreSQL"""
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+async_database_url = to_async_url(settings.DATABASE_URL)
+
+def asyncpg_dsn(url: str) -> Optional[str]:
+    """Plain asyncpg DSN for a database URL, or None if it is not PostgreSQL"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return None
+    return parsed.set(drivername="postgresql").render_as_string(hide_password=False)
+
+def pool_limits(replica: bool = False) -> Tuple[int, int]:
+    """
+    Work out (pool_size, max_overflow) of this worker's primary or replica pool.
+
+    DB_POOL_SIZE and DB_MAX_OVERFLOW are per-process limits. The server's
+    connection budget (DB_CONNECTION_BUDGET, or DB_READ_CONNECTION_BUDGET for
+    the replica) is split evenly across WEB_CONCURRENCY workers and both
+    limits are scaled down to fit this worker's share. On the primary, the
+    change listener's own connection comes out of that share.
+    """
+    pool_size = settings.DB_POOL_SIZE
+    max_overflow = settings.DB_MAX_OVERFLOW
+    budget = settings.DB_CONNECTION_BUDGET
+    if replica:
+        budget = settings.DB_READ_CONNECTION_BUDGET or budget
+
+    workers = settings.WEB_CONCURRENCY or 1
+    share = budget // workers
+    if not replica and settings.CHANGE_NOTIFICATIONS_ENABLED:
+        share -= 1
+    share = max(1, share)
+    if pool_size + max_overflow <= share:
+        return pool_size, max_overflow
+
+    # Keep the configured ratio of steady connections to overflow
+    scaled_size = max(1, round(share * pool_size / (pool_size + max_overflow)))
+    return scaled_size, share - scaled_size
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long checkouts wait for a connection
+    and how often they time out.
+
+    Slow waits and timeouts are logged at most once per
+    DB_POOL_WARN_INTERVAL_SECONDS so a saturated pool does not flood the logs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._last_warning = 0.0
+        self._unreported = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            self._warn("Connection pool checkout timed out after %.0f ms", start)
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited * 1000 >= settings.DB_POOL_WAIT_WARN_MS:
+                self.slow_checkouts += 1
+                self._warn("Connection pool checkout waited %.0f ms", start)
+
+    def _warn(self, message: str, start: float) -> None:
+        now = time.monotonic()
+        if now - self._last_warning < settings.DB_POOL_WARN_INTERVAL_SECONDS:
+            self._unreported += 1
+            return
+        logger.warning(
+            message + " (%s; %d similar events suppressed)",
+            (time.perf_counter() - start) * 1000,
+            self.status(),
+            self._unreported
+        )
+        self._last_warning = now
+        self._unreported = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.total_wait * 1000 / self.checkouts if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+def create_engine(url: str, replica: bool = False):
+    pool_size, max_overflow = pool_limits(replica)
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg://"):
+        connect_args["prepared_statement_cache_size"] = settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        echo=False,
+        future=True
+    )
+    if settings.QUERY_STATS_ENABLED:
+        instrument(engine.sync_engine, explain_dsn=asyncpg_dsn(url))
+    return engine
+
+engine = create_engine(async_database_url)
 
 AsyncSessionMaker = async_sessionmaker(
     engine,
@@ -26,6 +150,80 @@ AsyncSessionMaker = async_sessionmaker(
     autoflush=False
 )
 
+# Read-only endpoints go through deps.get_read_db, which falls back to the
+# primary when no replica is configured or the replica is lagging
+read_engine = create_engine(to_async_url(settings.DATABASE_READ_URL), replica=True) if settings.DATABASE_READ_URL else None
+
+ReadSessionMaker = async_sessionmaker(
+    read_engine or engine,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
+class ReplicaMonitor:
+    """
+    Tracks replication lag of the read replica.
+
+    Lag is measured at most once per DB_READ_LAG_CHECK_INTERVAL_SECONDS and
+    shared by all requests in the worker. A replica that has replayed all
+    WAL it received counts as caught up even if the primary has been idle.
+    """
+    LAG_QUERY = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery()
+                OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+
+    def __init__(self, read_engine):
+        self.read_engine = read_engine
+        self.lag: Optional[float] = None
+        self.healthy: Optional[bool] = None
+        self.checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def is_usable(self) -> bool:
+        if time.monotonic() - self.checked_at >= settings.DB_READ_LAG_CHECK_INTERVAL_SECONDS:
+            # Created here so it binds to the running event loop
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                # Another request may have checked while we waited
+                if time.monotonic() - self.checked_at >= settings.DB_READ_LAG_CHECK_INTERVAL_SECONDS:
+                    await self._check()
+        return bool(self.healthy)
+
+    async def _check(self) -> None:
+        was_healthy = self.healthy
+        try:
+            async with self.read_engine.connect() as conn:
+                self.lag = float(await conn.scalar(self.LAG_QUERY))
+            self.healthy = self.lag <= settings.DB_READ_MAX_LAG_SECONDS
+        except Exception as e:
+            self.lag = None
+            self.healthy = False
+            logger.error("Read replica check failed: %s", e)
+        finally:
+            self.checked_at = time.monotonic()
+
+        if self.healthy != was_healthy:
+            if self.healthy:
+                logger.info("Read replica in use (lag %.1fs)", self.lag)
+            else:
+                logger.warning("Read replica unusable (lag %s), reading from primary", self.lag)
+
+replica_monitor = ReplicaMonitor(read_engine) if read_engine else None
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics for this worker"""
+    return {
+        "workers": settings.WEB_CONCURRENCY or 1,
+        "connection_budget": settings.DB_CONNECTION_BUDGET,
+        **engine.pool.stats()
+    }
+
 async def get_db() -> AsyncSession:
     """Dependency for getting async database session"""
     async with AsyncSessionMaker() as session:
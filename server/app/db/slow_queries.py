@@ -0,0 +1,113 @@
+"""
+Slow query log with sampled EXPLAIN capture.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with their bound
+parameters redacted to types, and kept in a per-worker ring buffer served
+by GET /admin/stats/slow-queries.
+
+A sample of slow SELECT statements is re-run as EXPLAIN (ANALYZE, BUFFERS)
+on a fresh connection to the database that served them, never a pooled
+one, in a background task with SLOW_QUERY_EXPLAIN_TIMEOUT_MS as its
+statement timeout. At most one EXPLAIN runs per worker at a time. Other
+statements are never re-run, since ANALYZE executes them. Plans may show
+parameter values, so they are only kept for the admin endpoint, never
+logged.
+"""
+import asyncio
+import logging
+import random
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def redact(parameters: Any) -> List[str]:
+    """Parameter types only, e.g. ['str', 'list[3]', 'UUID']"""
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    redacted = []
+    for value in parameters or ():
+        if isinstance(value, (list, tuple)):
+            redacted.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            redacted.append(type(value).__name__)
+    return redacted
+
+def is_explainable(statement: str) -> bool:
+    """Plain SELECTs only; locking reads and anything else are not re-run"""
+    normalized = statement.lstrip().upper()
+    return normalized.startswith("SELECT") and " FOR UPDATE" not in normalized and " FOR SHARE" not in normalized
+
+class SlowQueryLog:
+    """Recent slow statements of this worker, newest last"""
+
+    def __init__(self, size: int):
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.explaining = False
+        self.recorded = 0
+        self.explained = 0
+
+    def record(
+        self,
+        dsn: Optional[str],
+        statement: str,
+        parameters: Sequence[Any],
+        duration: float,
+        request: Optional[str]
+    ) -> None:
+        entry = {
+            "captured_at": datetime.utcnow(),
+            "request": request,
+            "duration_ms": duration * 1000,
+            "statement": statement,
+            "parameters": redact(parameters),
+            "plan": None,
+            "explain_error": None
+        }
+        self.entries.append(entry)
+        self.recorded += 1
+        logger.warning(
+            "Slow query (%.0f ms) in %s: %s | parameters: %s",
+            entry["duration_ms"], request or "background", " ".join(statement.split()), entry["parameters"]
+        )
+
+        if (
+            dsn is None
+            or self.explaining
+            or not is_explainable(statement)
+            or random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.explaining = True
+        loop.create_task(self._explain(entry, dsn, statement, tuple(parameters or ())))
+
+    async def _explain(self, entry: Dict[str, Any], dsn: str, statement: str, parameters: tuple) -> None:
+        import asyncpg
+
+        try:
+            conn = await asyncpg.connect(
+                dsn,
+                timeout=10,
+                server_settings={"statement_timeout": str(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}
+            )
+            try:
+                rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", *parameters)
+            finally:
+                await conn.close()
+            entry["plan"] = "\n".join(row[0] for row in rows)
+            self.explained += 1
+        except Exception as e:
+            entry["explain_error"] = str(e)
+            logger.error(f"EXPLAIN of slow query failed: {e}")
+        finally:
+            self.explaining = False
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
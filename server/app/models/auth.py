@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, DateTime
 from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
 import uuid
 
 from app.models.base import Base
@@ -24,3 +25,31 @@ class User(Base):
 
     def __repr__(self):
         return f"<User {self.full_name} ({self.email})>"
+
+class RefreshToken(Base):
+    """
+    Rotating refresh token for admins and mentors.
+    Every token issued from one login shares a family_id. Revoking the family
+    invalidates the refresh chain and the access tokens minted from it.
+    """
+    __tablename__ = "refresh_tokens"
+
+    # Primary key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Only a SHA-256 of the opaque token is stored
+    token_hash = Column(String, unique=True, nullable=False, index=True)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    
+    # Owner of the token, a mentor or a user
+    subject_id = Column(UUID(as_uuid=True), nullable=False)
+    role = Column(String, nullable=False)
+    
+    # Lifecycle
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    rotated_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<RefreshToken {self.id} ({self.role} {self.subject_id})>"
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Float, DateTime, Enum, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Float, DateTime, Enum, ARRAY, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from datetime import datetime
 import uuid
 import logging
@@ -17,6 +17,21 @@ class Mentor(Base):
     This is the primary model as the platform only requires mentor accounts.
     """
     __tablename__ = "mentors"
+    # Performance indexes, built concurrently by migration c83f5a1e6d27.
+    # Enum columns store member names, hence 'APPROVED'.
+    __table_args__ = (
+        Index("ix_mentors_approved_name", "full_name", "id",
+              postgresql_where=text("moderation_status = 'APPROVED'")),
+        Index("ix_mentors_approved_country_name", func.lower(text("country")), "full_name", "id",
+              postgresql_where=text("moderation_status = 'APPROVED'")),
+        Index("ix_mentors_approved_city", func.lower(text("city")),
+              postgresql_where=text("moderation_status = 'APPROVED'")),
+        Index("ix_mentors_approved_research_interests", "research_interests",
+              postgresql_using="gin", postgresql_where=text("moderation_status = 'APPROVED'")),
+        Index("ix_mentors_email_lower", func.lower(text("email"))),
+        Index("ix_mentors_pending_created_at", "created_at",
+              postgresql_where=text("moderation_status = 'PENDING'")),
+    )
 
     # Primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -63,23 +78,11 @@ class Mentor(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
-    def __init__(self, **kwargs):
-        try:
-            super().__init__(**kwargs)
-            logger.info(f"Created mentor {self.email}")
-        except Exception as e:
-            logger.error(f"Create mentor failed - {self.email} - {str(e)}")
-            raise
-
     def update(self, **kwargs):
-        try:
-            for key, value in kwargs.items():
-                if hasattr(self, key):
-                    setattr(self, key, value)
-            logger.info(f"Updated mentor {self.email}")
-        except Exception as e:
-            logger.error(f"Update mentor failed - {self.email} - {str(e)}")
-            raise
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+        logger.debug("Updated mentor %s", self.email)
 
     def __repr__(self):
         return f"<Mentor {self.full_name} ({self.email})>"
@@ -87,4 +90,56 @@ class Mentor(Base):
     @property
     def is_approved(self):
         """Helper to check if mentor profile is approved"""
-        return self.moderation_status == ModerationStatus.APPROVED
\ No newline at end of file
+        return self.moderation_status == ModerationStatus.APPROVED
+
+# Columns public reads show (MentorResponse, the mentor_public projection).
+# The mentor triggers of app/db/notifications.py and app/db/read_model.py
+# only fire when one of them changes on a row that is or was approved, so
+# pending registrations and password rehashes do not clear caches.
+PUBLIC_COLUMNS = (
+    "id", "full_name", "email", "current_role", "institution", "department", "degrees",
+    "research_interests", "continent", "country", "city", "latitude", "longitude",
+    "linkedin_url", "profile_picture_url", "auth_provider", "moderation_status",
+    "created_at", "updated_at"
+)
+
+# Trigger clauses. current_role is a keyword, hence the quotes.
+PUBLIC_UPDATE_OF = ", ".join(f'"{column}"' for column in PUBLIC_COLUMNS)
+PUBLIC_UPDATE_WHEN = (
+    "(OLD.moderation_status = 'APPROVED' OR NEW.moderation_status = 'APPROVED') AND "
+    f"ROW({', '.join(f'OLD.{column}' for column in PUBLIC_COLUMNS)}) IS DISTINCT FROM "
+    f"ROW({', '.join(f'NEW.{column}' for column in PUBLIC_COLUMNS)})"
+)
+
+class MentorPublic(Base):
+    """
+    Read model of the public directory: one row per approved mentor with
+    lowercased filter keys and the MentorResponse document rendered as JSON.
+    Maintained by database triggers (see app/db/read_model.py), never
+    written by the application.
+    """
+    __tablename__ = "mentor_public"
+    __table_args__ = (
+        Index("ix_mentor_public_name", "full_name", "id"),
+        Index("ix_mentor_public_country_name", "country_key", "full_name", "id"),
+        Index("ix_mentor_public_continent_key", "continent_key"),
+        Index("ix_mentor_public_city_key", "city_key"),
+        Index("ix_mentor_public_research_interests", "research_interests", postgresql_using="gin"),
+    )
+
+    id = Column(UUID(as_uuid=True), ForeignKey("mentors.id", ondelete="CASCADE"), primary_key=True)
+    full_name = Column(String, nullable=False)  # sort key
+    research_interests = Column(ARRAY(String), nullable=False)  # globe containment filter
+
+    # Lowercased search keys
+    search_key = Column(String, nullable=False)  # keyword fields, separated by \x1f
+    interests_key = Column(String, nullable=False)  # research interests joined by ','
+    continent_key = Column(String, nullable=False)
+    country_key = Column(String, nullable=False)
+    city_key = Column(String, nullable=False)
+
+    doc = Column(JSONB, nullable=False)  # MentorResponse
+    refreshed_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<MentorPublic {self.full_name}>"
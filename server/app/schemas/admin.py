@@ -0,0 +1,102 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class LoginThrottleStats(BaseModel):
+    """Login rate limiter counters for the current worker"""
+    enabled: bool
+    backend: str
+    tracked_keys: int
+    allowed: int
+    throttled_ip: int
+    throttled_account: int
+    store_errors: int
+
+class DatabasePoolStats(BaseModel):
+    """Database connection pool statistics for the current worker"""
+    workers: int
+    connection_budget: Optional[int]
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    slow_checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+class CacheStats(BaseModel):
+    """Counters of one in-process cache"""
+    name: str
+    enabled: bool
+    entries: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    invalidations: int
+
+class ChangeNotificationStats(BaseModel):
+    """Change listener state and cache counters for the current worker"""
+    enabled: bool
+    connected: bool
+    triggers_installed: bool
+    revision: int
+    events: int
+    disconnects: int
+    caches: List[CacheStats]
+
+class RouteQueryStats(BaseModel):
+    """Database usage of one route for the current worker"""
+    route: str
+    requests: int
+    queries: int
+    avg_queries: float
+    max_queries: int
+    avg_db_ms: float
+    max_db_ms: float
+    repeated_statement_requests: int
+
+class SlowQuery(BaseModel):
+    """A statement slower than SLOW_QUERY_THRESHOLD_MS"""
+    captured_at: datetime
+    request: Optional[str]
+    duration_ms: float
+    statement: str
+    parameters: List[str]  # types only, values are redacted
+    plan: Optional[str]  # EXPLAIN (ANALYZE, BUFFERS) output when sampled
+    explain_error: Optional[str]
+
+class ProfileSummary(BaseModel):
+    """A profiled request, see GET /admin/profiles/{profile_id} for its stacks"""
+    id: str
+    method: str
+    path: str
+    trigger: str  # header or sampled
+    status: Optional[int]
+    started_at: datetime
+    duration_ms: float
+    cpu_ms: float  # samples times PROFILE_INTERVAL_MS
+    samples: int
+
+class MemoryStats(BaseModel):
+    """Memory of the current worker"""
+    pid: int
+    uptime_seconds: float
+    rss_mb: Optional[float]  # None where /proc is not available
+    peak_rss_mb: float
+    rss_limit_mb: Optional[int]
+    recycles_on_limit: bool  # only gunicorn workers are replaced
+    tracing: bool
+    trace_frames: int
+    traced_mb: float
+    traced_peak_mb: float
+
+class AllocationGrowth(BaseModel):
+    """Growth of one allocation site since the tracemalloc baseline"""
+    location: List[str]  # file:line, innermost last
+    size_kb: float
+    size_diff_kb: float
+    count: int
+    count_diff: int
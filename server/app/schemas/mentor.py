@@ -1,8 +1,7 @@
-from pydantic import BaseModel, EmailStr, HttpUrl, Field, UUID4, constr
+from pydantic import BaseModel, EmailStr, HttpUrl, Field, UUID4, constr, field_validator
 from typing import List, Optional, Tuple
 from datetime import datetime
 from app.models.enums import ModerationStatus, AuthProvider
-from pydantic import validator
 
 class MentorBase(BaseModel):
     """Base Mentor schema with common fields"""
@@ -102,13 +101,15 @@ class MentorBase(BaseModel):
         description="Profile picture URL"
     )
 
-    @validator('degrees')
+    @field_validator('degrees')
+    @classmethod
     def validate_degrees(cls, v):
         if not all(2 <= len(d) <= 200 for d in v):
             raise ValueError("Each degree must be between 2 and 200 characters")
         return v
 
-    @validator('research_interests')
+    @field_validator('research_interests')
+    @classmethod
     def validate_research_interests(cls, v):
         if not all(2 <= len(i) <= 100 for i in v):
             raise ValueError("Each research interest must be between 2 and 100 characters")
@@ -144,13 +145,15 @@ class MentorUpdate(BaseModel):
     linkedin_url: Optional[str] = Field(None, max_length=200)
     profile_picture_url: Optional[str] = Field(None, max_length=500)
 
-    @validator('degrees')
+    @field_validator('degrees')
+    @classmethod
     def validate_degrees(cls, v):
         if v and not all(2 <= len(d) <= 200 for d in v):
             raise ValueError("Each degree must be between 2 and 200 characters")
         return v
 
-    @validator('research_interests')
+    @field_validator('research_interests')
+    @classmethod
     def validate_research_interests(cls, v):
         if v and not all(2 <= len(i) <= 100 for i in v):
             raise ValueError("Each research interest must be between 2 and 100 characters")
@@ -260,24 +263,28 @@ class SearchResponse(BaseModel):
             UUID4: lambda v: str(v)
         }
         
-    @validator('items')
+    @field_validator('items', mode='before')
+    @classmethod
     def validate_items(cls, v):
         """Ensure items is always a list"""
         if v is None:
             return []
         return list(v)
 
-    @validator('total')
+    @field_validator('total')
+    @classmethod
     def validate_total(cls, v):
         """Ensure total is never negative"""
         return max(0, v)
 
-    @validator('page')
+    @field_validator('page')
+    @classmethod
     def validate_page(cls, v):
         """Ensure page is at least 1"""
         return max(1, v)
 
-    @validator('page_size')
+    @field_validator('page_size')
+    @classmethod
     def validate_page_size(cls, v):
         """Ensure page_size is at least 1"""
         return max(1, v)
@@ -0,0 +1,112 @@
+"""
+Account resolution and creation for the auth endpoints.
+
+Admins live in `users` and mentors in `mentors`, but both log in through the
+same endpoints. These helpers resolve an account in a single round trip
+instead of probing each table in turn, and register mentors without
+separate uniqueness checks.
+"""
+from typing import Any, Dict, NamedTuple, Optional
+from sqlalchemy import String, and_, bindparam, case, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.auth import User
+from app.models.mentor import Mentor
+from app.models.enums import AuthProvider
+
+def _build_account_by_email():
+    probe = select(bindparam("email", type_=String).label("email")).subquery("probe")
+    return (
+        select(User, Mentor)
+        .select_from(probe)
+        .outerjoin(User, User.email == probe.c.email)
+        .outerjoin(Mentor, Mentor.email == probe.c.email)
+    )
+
+# Built once; the email is bound per call
+ACCOUNT_BY_EMAIL = _build_account_by_email()
+
+class DuplicateAccountError(Exception):
+    """Raised when a new mentor collides with an existing unique field"""
+    def __init__(self, field: str):
+        super().__init__(f"Mentor with this {field} already exists")
+        self.field = field
+
+class ResolvedAccount(NamedTuple):
+    """Accounts registered under one email. Either side may be None."""
+    admin: Optional[User]
+    mentor: Optional[Mentor]
+
+async def resolve_account_by_email(db: AsyncSession, email: str) -> ResolvedAccount:
+    """
+    Look up the admin and mentor accounts for an email in one query.
+
+    A single-row probe is outer joined to both tables, so the query always
+    returns exactly one row and each side uses its unique email index.
+    """
+    result = await db.execute(ACCOUNT_BY_EMAIL, {"email": email})
+    admin, mentor = result.one()
+    return ResolvedAccount(admin=admin, mentor=mentor)
+
+async def resolve_google_account(
+    db: AsyncSession, google_id: str, email: str
+) -> Optional[Mentor]:
+    """
+    Find the mentor for a Google login, preferring a match on Google ID
+    and falling back to the email address, in one query.
+
+    Callers can tell which side matched by comparing `google_id`.
+    """
+    matches_google_id = and_(
+        Mentor.auth_provider == AuthProvider.GOOGLE,
+        Mentor.google_id == google_id
+    )
+    query = (
+        select(Mentor)
+        .where(or_(matches_google_id, Mentor.email == email))
+        .order_by(case((matches_google_id, 0), else_=1))
+        .limit(1)
+    )
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def insert_mentor(db: AsyncSession, values: Dict[str, Any]) -> Mentor:
+    """
+    Insert and commit a new mentor with a single
+    INSERT ... ON CONFLICT DO NOTHING RETURNING statement.
+
+    Uniqueness of email, google_id and orcid_id is left to the database, so
+    concurrent signups cannot both pass a pre-check. Only when the insert
+    is skipped is the conflicting field looked up.
+
+    Raises:
+        DuplicateAccountError: naming the field that is already taken
+    """
+    stmt = insert(Mentor).values(**values).on_conflict_do_nothing().returning(Mentor)
+    result = await db.execute(stmt)
+    mentor = result.scalar_one_or_none()
+
+    if mentor is None:
+        await db.rollback()
+        raise DuplicateAccountError(await _find_conflicting_field(db, values))
+
+    await db.commit()
+    return mentor
+
+async def _find_conflicting_field(db: AsyncSession, values: Dict[str, Any]) -> str:
+    """Work out which unique field made an insert conflict"""
+    unique_fields = [
+        field for field in ("email", "google_id", "orcid_id")
+        if values.get(field) is not None
+    ]
+    query = select(*[getattr(Mentor, field) for field in unique_fields]).where(
+        or_(*[getattr(Mentor, field) == values[field] for field in unique_fields])
+    )
+    result = await db.execute(query)
+    rows = result.all()
+    for field in unique_fields:
+        if any(row._mapping[field] == values[field] for row in rows):
+            return field
+    # The conflicting row went away in the meantime
+    return "email"
@@ -0,0 +1,272 @@
+"""
+Prebuilt statements for the hot mentor and admin lookups.
+
+Every statement is built once, at import or on first use of a filter
+combination, with named bind parameters for the per-request values.
+SQLAlchemy memoizes the cache key of a statement object, so executing one
+skips rebuilding the select() tree and re-hashing it to find the compiled
+SQL. Variable-length filters are passed as a single array parameter, so
+every request of a given shape renders the same SQL and asyncpg can reuse
+its prepared statement.
+
+The *_json variants have Postgres render MentorResponse documents with
+json_build_object (see mentor_json), for DB_JSON_RENDERING_ENABLED. The
+worker passes the text through without loading ORM entities or running
+pydantic. Key order matches MentorResponse; timestamps are formatted by
+Postgres, which drops trailing zeros of fractional seconds.
+
+Functions taking fields (a sparse fieldset, see deps.get_mentor_fields)
+load or render only those columns. Pruned statements are cached per
+fieldset like the rest.
+"""
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Type, Union
+from uuid import UUID
+from pydantic import BaseModel
+from sqlalchemy import Enum, String, Text, and_, any_, bindparam, cast, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.models.auth import User
+from app.models.mentor import Mentor
+from app.models.enums import ModerationStatus
+from app.core.serialization import partial_model
+from app.schemas.mentor import MentorResponse
+
+IS_APPROVED = Mentor.moderation_status == ModerationStatus.APPROVED
+
+MENTOR_BY_ID = select(Mentor).where(Mentor.id == bindparam("mentor_id"))
+
+APPROVED_MENTOR_BY_ID = select(Mentor).where(Mentor.id == bindparam("mentor_id"), IS_APPROVED)
+
+ADMIN_BY_ID = select(User).where(User.id == bindparam("user_id"), User.role == "admin")
+
+GLOBE_MENTORS = select(Mentor).where(IS_APPROVED)
+
+GLOBE_MENTORS_WITH_INTERESTS = GLOBE_MENTORS.where(
+    Mentor.research_interests.op("@>")(bindparam("interests", type_=ARRAY(String)))
+)
+
+def _build_tag_suggestions() -> Select:
+    tags = select(
+        func.lower(func.unnest(Mentor.research_interests)).label("tag")
+    ).where(IS_APPROVED).subquery()
+    return (
+        select(tags.c.tag)
+        .where(tags.c.tag.like(bindparam("pattern"), escape="\\"))
+        .distinct()
+        .order_by(tags.c.tag)
+        .limit(bindparam("limit"))
+    )
+
+TAG_SUGGESTIONS = _build_tag_suggestions()
+
+def mentor_json(model: Type[BaseModel] = MentorResponse) -> ColumnElement:
+    """json_build_object of the mentor columns behind model's fields, in field order"""
+    arguments = []
+    for name in model.model_fields:
+        column = Mentor.__table__.c[name]
+        if isinstance(column.type, Enum):
+            # Stored as the member name, rendered as its lowercase value
+            column = func.lower(cast(column, Text))
+        arguments.extend([literal_column(f"'{name}'"), column])
+    return func.json_build_object(*arguments)
+
+Fields = Optional[Tuple[str, ...]]
+
+@lru_cache(maxsize=256)
+def _pruned(stmt: Select, fields: Fields) -> Select:
+    """stmt loading only the Mentor columns in fields (and the primary key)"""
+    if fields is None:
+        return stmt
+    return stmt.options(load_only(*(getattr(Mentor, name) for name in fields)))
+
+@lru_cache(maxsize=256)
+def _globe_json_statement(with_interests: bool, fields: Fields) -> Select:
+    stmt = select(cast(mentor_json(partial_model(MentorResponse, fields)), Text)).where(IS_APPROVED)
+    if with_interests:
+        stmt = stmt.where(Mentor.research_interests.op("@>")(bindparam("interests", type_=ARRAY(String))))
+    return stmt
+
+async def get_mentor_by_id(db: AsyncSession, mentor_id: UUID) -> Optional[Mentor]:
+    result = await db.execute(MENTOR_BY_ID, {"mentor_id": mentor_id})
+    return result.scalar_one_or_none()
+
+async def get_approved_mentor_by_id(db: AsyncSession, mentor_id: UUID, fields: Fields = None) -> Optional[Mentor]:
+    result = await db.execute(_pruned(APPROVED_MENTOR_BY_ID, fields), {"mentor_id": mentor_id})
+    return result.scalar_one_or_none()
+
+async def get_admin_by_id(db: AsyncSession, user_id: Union[str, UUID]) -> Optional[User]:
+    result = await db.execute(ADMIN_BY_ID, {"user_id": user_id})
+    return result.scalar_one_or_none()
+
+@lru_cache(maxsize=None)
+def _search_statements(
+    keyword: bool,
+    interests: bool,
+    continent: bool,
+    country: bool,
+    city: bool
+) -> Tuple[Select, Select]:
+    """
+    (count, page) statements for one combination of search filters.
+    There are at most 32 combinations, each built once.
+    """
+    criteria = [IS_APPROVED]
+    if keyword:
+        pattern = bindparam("keyword", type_=String)
+        criteria.append(or_(
+            func.lower(Mentor.full_name).contains(pattern),
+            func.lower(Mentor.email).contains(pattern),
+            func.lower(Mentor.institution).contains(pattern),
+            func.lower(Mentor.department).contains(pattern),
+            func.lower(Mentor.current_role).contains(pattern),
+            func.lower(func.array_to_string(Mentor.research_interests, ' ', '')).contains(pattern),
+            func.lower(func.array_to_string(Mentor.degrees, ' ', '')).contains(pattern)
+        ))
+    if interests:
+        # Mentors with ANY of the interests, as one LIKE ANY(array) clause
+        criteria.append(
+            func.lower(func.array_to_string(Mentor.research_interests, ',', '')).like(
+                any_(bindparam("interest_patterns", type_=ARRAY(String)))
+            )
+        )
+    if continent:
+        criteria.append(func.lower(Mentor.continent) == bindparam("continent", type_=String))
+    if country:
+        criteria.append(func.lower(Mentor.country) == bindparam("country", type_=String))
+    if city:
+        criteria.append(func.lower(Mentor.city) == bindparam("city", type_=String))
+
+    where = and_(*criteria)
+    count = select(func.count()).select_from(Mentor).where(where)
+    # Stable order so pages do not overlap; served by ix_mentors_approved_name
+    page = (
+        select(Mentor)
+        .where(where)
+        .order_by(Mentor.full_name, Mentor.id)
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+    return count, page
+
+def _search_params(
+    keyword: Optional[str],
+    research_interests: Sequence[str],
+    continent: Optional[str],
+    country: Optional[str],
+    city: Optional[str]
+) -> dict:
+    return {
+        "keyword": keyword.strip().lower() if keyword else None,
+        "interest_patterns": [f"%{interest.lower()}%" for interest in research_interests],
+        "continent": continent.lower() if continent else None,
+        "country": country.lower() if country else None,
+        "city": city.lower() if city else None
+    }
+
+@lru_cache(maxsize=256)
+def _search_json_statement(filters: Tuple[bool, ...], fields: Fields) -> Select:
+    """The page statement of _search_statements, aggregated into one JSON array"""
+    _, page = _search_statements(*filters)
+    rows = page.with_only_columns(
+        mentor_json(partial_model(MentorResponse, fields)).label("doc"), Mentor.full_name, Mentor.id
+    ).subquery("page")
+    items = func.json_agg(aggregate_order_by(rows.c.doc, rows.c.full_name, rows.c.id))
+    return select(cast(func.coalesce(items, literal_column("'[]'::json")), Text)).select_from(rows)
+
+async def search_approved_mentors(
+    db: AsyncSession,
+    keyword: Optional[str] = None,
+    research_interests: Sequence[str] = (),
+    continent: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    fields: Fields = None
+) -> Tuple[int, List[Mentor]]:
+    """
+    Search approved mentors. Text filters are case-insensitive.
+
+    Returns:
+        (total, mentors) - the total match count and the requested page
+    """
+    params = _search_params(keyword, research_interests, continent, country, city)
+    count_stmt, page_stmt = _search_statements(
+        bool(params["keyword"]), bool(research_interests), bool(continent), bool(country), bool(city)
+    )
+
+    total = await db.scalar(count_stmt, params) or 0
+    result = await db.execute(
+        _pruned(page_stmt, fields),
+        {**params, "offset": (page - 1) * page_size, "limit": page_size}
+    )
+    return total, list(result.scalars().all())
+
+async def search_approved_mentors_json(
+    db: AsyncSession,
+    keyword: Optional[str] = None,
+    research_interests: Sequence[str] = (),
+    continent: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    fields: Fields = None
+) -> Tuple[int, bytes]:
+    """
+    search_approved_mentors with the page rendered by Postgres.
+
+    Returns:
+        (total, items) - the total match count and the page as a JSON array
+    """
+    params = _search_params(keyword, research_interests, continent, country, city)
+    filters = (bool(params["keyword"]), bool(research_interests), bool(continent), bool(country), bool(city))
+    count_stmt, _ = _search_statements(*filters)
+
+    total = await db.scalar(count_stmt, params) or 0
+    items = await db.scalar(
+        _search_json_statement(filters, fields),
+        {**params, "offset": (page - 1) * page_size, "limit": page_size}
+    )
+    return total, items.encode()
+
+async def list_globe_mentors(
+    db: AsyncSession,
+    research_interests: Sequence[str] = (),
+    fields: Fields = None
+) -> List[Mentor]:
+    """Approved mentors having ALL of the given research interests"""
+    if research_interests:
+        result = await db.execute(
+            _pruned(GLOBE_MENTORS_WITH_INTERESTS, fields),
+            {"interests": list(research_interests)}
+        )
+    else:
+        result = await db.execute(_pruned(GLOBE_MENTORS, fields))
+    return list(result.scalars().all())
+
+async def iter_globe_mentors_json(
+    db: AsyncSession,
+    research_interests: Sequence[str] = (),
+    batch_size: int = 500,
+    fields: Fields = None
+) -> AsyncIterator[str]:
+    """
+    JSON documents of list_globe_mentors, fetched from a server-side
+    cursor batch_size rows at a time
+    """
+    stmt = _globe_json_statement(bool(research_interests), fields)
+    params = {"interests": list(research_interests)} if research_interests else {}
+    result = await db.stream_scalars(stmt, params, execution_options={"yield_per": batch_size})
+    async for doc in result:
+        yield doc
+
+async def suggest_research_interests(db: AsyncSession, prefix: str, limit: int) -> List[str]:
+    """Distinct lowercased research interests of approved mentors starting with prefix"""
+    pattern = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    result = await db.execute(TAG_SUGGESTIONS, {"pattern": pattern, "limit": limit})
+    return list(result.scalars().all())
@@ -0,0 +1,152 @@
+"""
+Public directory reads from the mentor_public read model.
+
+mentor_public holds approved mentors only, with lowercased filter keys and
+each MentorResponse document rendered by the database (see
+app/db/read_model.py). These queries return that JSON as text, so the
+endpoints write it out without loading ORM entities or running pydantic.
+Used when PUBLIC_READ_MODEL_ENABLED is set.
+
+Sparse fieldsets are cut from the stored documents by the database, so
+only the requested keys leave it.
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import String, Text, any_, bindparam, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.mentor import MentorPublic
+
+Fields = Optional[Tuple[str, ...]]
+
+DOC_JSON = cast(MentorPublic.doc, Text)
+
+@lru_cache(maxsize=256)
+def _doc_json(fields: Fields):
+    """The stored document as text, cut down to fields in that order"""
+    if fields is None:
+        return DOC_JSON
+    arguments = []
+    for name in fields:
+        arguments.extend([literal_column(f"'{name}'"), MentorPublic.doc[name]])
+    return cast(func.json_build_object(*arguments), Text)
+
+@lru_cache(maxsize=256)
+def _doc_by_id(fields: Fields) -> Select:
+    return select(_doc_json(fields)).where(MentorPublic.id == bindparam("mentor_id"))
+
+@lru_cache(maxsize=256)
+def _globe_docs(with_interests: bool, fields: Fields) -> Select:
+    stmt = select(_doc_json(fields))
+    if with_interests:
+        stmt = stmt.where(MentorPublic.research_interests.op("@>")(bindparam("interests", type_=ARRAY(String))))
+    return stmt
+
+def _build_tag_suggestions() -> Select:
+    tags = select(func.lower(func.unnest(MentorPublic.research_interests)).label("tag")).subquery()
+    return (
+        select(tags.c.tag)
+        .where(tags.c.tag.like(bindparam("pattern"), escape="\\"))
+        .distinct()
+        .order_by(tags.c.tag)
+        .limit(bindparam("limit"))
+    )
+
+TAG_SUGGESTIONS = _build_tag_suggestions()
+
+def json_array(docs: Iterable[str]) -> bytes:
+    """Join pre-rendered JSON documents into a JSON array"""
+    return ("[" + ",".join(docs) + "]").encode()
+
+@lru_cache(maxsize=256)
+def _search_statements(
+    keyword: bool,
+    interests: bool,
+    continent: bool,
+    country: bool,
+    city: bool,
+    fields: Fields = None
+) -> Tuple[Select, Select]:
+    """(count, page) statements for one combination of search filters"""
+    criteria = []
+    if keyword:
+        criteria.append(MentorPublic.search_key.contains(bindparam("keyword", type_=String)))
+    if interests:
+        criteria.append(MentorPublic.interests_key.like(
+            any_(bindparam("interest_patterns", type_=ARRAY(String)))
+        ))
+    if continent:
+        criteria.append(MentorPublic.continent_key == bindparam("continent", type_=String))
+    if country:
+        criteria.append(MentorPublic.country_key == bindparam("country", type_=String))
+    if city:
+        criteria.append(MentorPublic.city_key == bindparam("city", type_=String))
+
+    count = select(func.count()).select_from(MentorPublic).where(*criteria)
+    page = (
+        select(_doc_json(fields))
+        .where(*criteria)
+        .order_by(MentorPublic.full_name, MentorPublic.id)
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+    return count, page
+
+async def search_mentors(
+    db: AsyncSession,
+    keyword: Optional[str] = None,
+    research_interests: Sequence[str] = (),
+    continent: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 10,
+    fields: Fields = None
+) -> Tuple[int, bytes]:
+    """
+    Same filters and order as mentors.search_approved_mentors.
+
+    Returns:
+        (total, items) - the total match count and the page as a JSON array
+    """
+    keyword = keyword.strip().lower() if keyword else None
+    params = {
+        "keyword": keyword,
+        "interest_patterns": [f"%{interest.lower()}%" for interest in research_interests],
+        "continent": continent.lower() if continent else None,
+        "country": country.lower() if country else None,
+        "city": city.lower() if city else None
+    }
+    count_stmt, page_stmt = _search_statements(
+        bool(keyword), bool(research_interests), bool(continent), bool(country), bool(city), fields
+    )
+
+    total = await db.scalar(count_stmt, params) or 0
+    result = await db.execute(page_stmt, {**params, "offset": (page - 1) * page_size, "limit": page_size})
+    return total, json_array(result.scalars())
+
+async def get_mentor(db: AsyncSession, mentor_id: UUID, fields: Fields = None) -> Optional[bytes]:
+    """An approved mentor's document, or None"""
+    doc = await db.scalar(_doc_by_id(fields), {"mentor_id": mentor_id})
+    return doc.encode() if doc is not None else None
+
+async def list_globe_mentors(
+    db: AsyncSession,
+    research_interests: Sequence[str] = (),
+    fields: Fields = None
+) -> bytes:
+    """Approved mentors having ALL of the given research interests, as a JSON array"""
+    if research_interests:
+        result = await db.execute(_globe_docs(True, fields), {"interests": list(research_interests)})
+    else:
+        result = await db.execute(_globe_docs(False, fields))
+    return json_array(result.scalars())
+
+async def suggest_research_interests(db: AsyncSession, prefix: str, limit: int) -> List[str]:
+    """Distinct lowercased research interests starting with prefix"""
+    pattern = prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    result = await db.execute(TAG_SUGGESTIONS, {"pattern": pattern, "limit": limit})
+    return list(result.scalars().all())
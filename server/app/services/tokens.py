@@ -0,0 +1,161 @@
+"""
+Refresh token issuing, rotation and revocation.
+
+Refresh tokens are opaque, single use and stored hashed. Each refresh
+rotates the token within its family. Presenting a token that was already
+rotated means it leaked, so the whole family is revoked. Reuse within
+REFRESH_REUSE_GRACE_SECONDS of the rotation is only refused: two tabs
+refreshing together, or a client retrying after losing the response, would
+otherwise log the user out everywhere.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+from sqlalchemy import bindparam, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.revocation import revocation_filter
+from app.core.security import create_refresh_token, hash_refresh_token
+from app.db.notifications import TOKEN_REVOKED, change_listener
+from app.db.session import AsyncSessionMaker
+from app.models.auth import RefreshToken
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Prebuilt so the per-request lookups skip statement construction
+TOKEN_BY_HASH = select(RefreshToken).where(RefreshToken.token_hash == bindparam("token_hash"))
+
+FAMILY_REVOKED = select(exists().where(
+    RefreshToken.family_id == bindparam("family_id"),
+    RefreshToken.revoked_at.isnot(None)
+))
+
+class InvalidRefreshToken(Exception):
+    """Raised when a refresh token is unknown, expired, revoked or reused"""
+    pass
+
+async def issue_refresh_token(
+    db: AsyncSession,
+    subject_id: Union[str, uuid.UUID],
+    role: str,
+    family_id: Optional[uuid.UUID] = None
+) -> Tuple[str, RefreshToken]:
+    """
+    Store and commit a new refresh token, starting a new family unless one
+    is given.
+
+    Returns:
+        (token, record) - the plain token is only available here
+    """
+    token, token_hash = create_refresh_token()
+    record = RefreshToken(
+        token_hash=token_hash,
+        family_id=family_id or uuid.uuid4(),
+        subject_id=subject_id,
+        role=role,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    db.add(record)
+    await db.commit()
+    return token, record
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> RefreshToken:
+    """
+    Mark a refresh token as used and return it. The caller issues the
+    replacement in the same transaction.
+
+    Raises:
+        InvalidRefreshToken: if the token cannot be used
+    """
+    token_hash = hash_refresh_token(token)
+    now = datetime.utcnow()
+    stmt = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.rotated_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now
+        )
+        .values(rotated_at=now)
+        .returning(RefreshToken)
+    )
+    result = await db.execute(stmt)
+    record = result.scalar_one_or_none()
+    if record is not None:
+        return record
+
+    await db.rollback()
+    stale = await find_refresh_token(db, token)
+    if stale is not None and stale.rotated_at is not None and stale.revoked_at is None:
+        if now - stale.rotated_at <= timedelta(seconds=settings.REFRESH_REUSE_GRACE_SECONDS):
+            logger.info("Refresh token of family %s reused within the grace period, refusing", stale.family_id)
+        else:
+            logger.warning("Refresh token reuse detected, revoking family %s", stale.family_id)
+            await revoke_family(db, stale.family_id)
+    raise InvalidRefreshToken()
+
+async def find_refresh_token(db: AsyncSession, token: str) -> Optional[RefreshToken]:
+    result = await db.execute(TOKEN_BY_HASH, {"token_hash": hash_refresh_token(token)})
+    return result.scalar_one_or_none()
+
+async def revoke_family(db: AsyncSession, family_id: uuid.UUID) -> None:
+    """Revoke every token in a family and record it in this worker's filter"""
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    await db.execute(stmt)
+    await db.commit()
+    revocation_filter.add(family_id)
+
+async def is_family_revoked(db: AsyncSession, family_id: str) -> bool:
+    """
+    Check whether access tokens from a family were revoked.
+    Only filter hits, including false positives, reach the database.
+    """
+    if not revocation_filter.might_be_revoked(family_id):
+        return False
+    try:
+        family_uuid = uuid.UUID(str(family_id))
+    except ValueError:
+        return True
+    return bool(await db.scalar(FAMILY_REVOKED, {"family_id": family_uuid}))
+
+async def load_revoked_families(db: AsyncSession) -> List[uuid.UUID]:
+    """Revoked families that may still have unexpired tokens"""
+    query = select(RefreshToken.family_id).where(
+        RefreshToken.revoked_at.isnot(None),
+        RefreshToken.expires_at > datetime.utcnow()
+    ).distinct()
+    result = await db.execute(query)
+    return result.scalars().all()
+
+async def sync_revocation_filter() -> None:
+    """Rebuild this worker's revocation filter from the database"""
+    async with AsyncSessionMaker() as db:
+        families = await load_revoked_families(db)
+    revocation_filter.rebuild(families)
+
+def on_token_revoked(payload: Optional[dict]) -> None:
+    """Add families revoked by other workers as soon as the revocation commits"""
+    if payload is not None:
+        revocation_filter.add(payload["family_id"])
+
+change_listener.subscribe(TOKEN_REVOKED, on_token_revoked)
+
+async def revocation_sync_loop() -> None:
+    """Keep the revocation filter in sync with the other workers"""
+    while True:
+        try:
+            await sync_revocation_filter()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Revocation filter sync failed")
+        await asyncio.sleep(settings.REVOCATION_SYNC_INTERVAL_SECONDS)
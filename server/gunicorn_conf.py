@@ -1,5 +1,6 @@
 import multiprocessing
 import os
+import tempfile
 
 # Gunicorn config variables
 workers_per_core_str = os.getenv("WORKERS_PER_CORE", "1")
@@ -8,6 +9,9 @@ host = os.getenv("HOST", "0.0.0.0")
 port = os.getenv("PORT", "10000")
 bind_env = os.getenv("BIND", None)
 use_loglevel = os.getenv("LOG_LEVEL", "info")
+max_requests_str = os.getenv("MAX_REQUESTS", "10000")
+max_requests_jitter_str = os.getenv("MAX_REQUESTS_JITTER", "1000")
+forwarded_allow_ips_str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
 
 if bind_env:
     use_bind = bind_env
@@ -23,6 +27,20 @@ if web_concurrency_str:
 else:
     web_concurrency = max(int(default_web_concurrency), 2)
 
+# Workers size their DB pools from this (see app/db/session.py)
+os.environ["WEB_CONCURRENCY"] = str(web_concurrency)
+
+# Workers write their metrics here so /metrics can sum them (see app/core/metrics.py).
+# Set before the app, and with it prometheus_client, is imported.
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), f"bamn-prometheus-{port}")
+)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+# Profiles go here, so any worker can serve GET /admin/profiles/{id} (see app/core/profiling.py)
+os.environ.setdefault("PROFILE_DIR", os.path.join(tempfile.gettempdir(), f"bamn-profiles-{port}"))
+
 # Gunicorn config
 bind = use_bind
 workers = web_concurrency
@@ -30,4 +48,76 @@ worker_class = "uvicorn.workers.UvicornWorker"
 keepalive = 120
 errorlog = "-"  # stderr
 accesslog = "-"  # stdout
-loglevel = use_loglevel 
\ No newline at end of file
+loglevel = use_loglevel 
+
+# Proxies whose X-Forwarded-For and X-Forwarded-Proto are trusted. Behind a
+# load balancer this must include its address, or every request appears to
+# come from it and shares one login throttling bucket per IP.
+forwarded_allow_ips = forwarded_allow_ips_str
+
+# Recycle workers so slow memory growth cannot accumulate. Each worker picks
+# its limit between MAX_REQUESTS and MAX_REQUESTS + MAX_REQUESTS_JITTER so they
+# do not all restart at once. 0 disables. See also MEMORY_RSS_LIMIT_MB.
+max_requests = int(max_requests_str)
+max_requests_jitter = int(max_requests_jitter_str)
+
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+def on_starting(server):
+    """Prepare the schema once here instead of in every worker's lifespan"""
+    import asyncio
+    from app.db.schema import prepare_schema_once
+
+    # Metrics left by a previous run would be added to this one's
+    for name in os.listdir(prometheus_dir):
+        os.remove(os.path.join(prometheus_dir, name))
+
+    asyncio.run(prepare_schema_once())
+
+def post_fork(server, worker):
+    # Never reuse pooled connections or listener state inherited from the master
+    from app.db.notifications import change_listener
+    from app.db.session import engine, read_engine
+
+    engine.sync_engine.dispose(close=False)
+    if read_engine is not None:
+        read_engine.sync_engine.dispose(close=False)
+    change_listener.reset()
+
+def _fold_worker_metrics(pid):
+    """
+    Add an exited worker's counters and histograms to the folded totals and
+    delete its files, so recycled workers do not pile up files every scrape
+    has to read.
+    """
+    from prometheus_client.mmap_dict import MmapedDict
+
+    for kind in ("counter", "histogram"):
+        worker_file = os.path.join(prometheus_dir, f"{kind}_{pid}.db")
+        if not os.path.exists(worker_file):
+            continue
+        folded_file = os.path.join(prometheus_dir, f"{kind}_folded.db")
+        totals = {}
+        for path in (folded_file, worker_file):
+            if os.path.exists(path):
+                for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(path):
+                    total, latest = totals.get(key, (0.0, 0.0))
+                    totals[key] = (total + value, max(latest, timestamp))
+        # Not *.db until complete, so scrapes skip it
+        pending_file = folded_file + ".pending"
+        if os.path.exists(pending_file):
+            os.remove(pending_file)
+        folded = MmapedDict(pending_file)
+        for key, (value, timestamp) in totals.items():
+            folded.write_value(key, value, timestamp)
+        folded.close()
+        os.replace(pending_file, folded_file)
+        os.remove(worker_file)
+
+def child_exit(server, worker):
+    # Drop the exited worker's gauges and fold its counters and histograms into the totals
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+    _fold_worker_metrics(worker.pid)
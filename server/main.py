@@ -1,26 +1,30 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import exc
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
-from app.models.base import Base
 from app.core.config import settings
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core import metrics
+from app.core.logging import configure_logging
+from app.core.memory import memory_tracer, rss_watchdog
+from app.core.middleware import RequestMiddleware
+from app.core.profiling import ProfilingMiddleware
 from app.api.v1.router import api_router, tags_metadata
-from app.db.session import engine
+from app.api.deps import verify_metrics_token
+from app.db.session import engine, read_engine
+from app.db.schema import prepare_schema
+from app.db.notifications import change_listener
+from app.core.exceptions import DeadlineExceeded
+from app.db.deadlines import is_statement_timeout
+from app.services.tokens import revocation_sync_loop
 from contextlib import asynccontextmanager
+import asyncio
 import logging
-import time
-from typing import Callable
-
-# Clear existing handlers
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-
-# Set up basic logging configuration
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format=settings.LOG_FORMAT,
-    datefmt=settings.LOG_DATE_FORMAT,
-    force=True
-)
+
+# Replace existing handlers with the queue pipeline (see app/core/logging.py)
+configure_logging()
 
 # Configure loggers with minimal output
 loggers_config = {
@@ -41,12 +45,24 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await prepare_schema(engine)
+    tasks = [asyncio.create_task(revocation_sync_loop())]
+    if settings.CHANGE_NOTIFICATIONS_ENABLED and change_listener.dsn:
+        tasks.append(asyncio.create_task(change_listener.run()))
+    if settings.METRICS_ENABLED:
+        tasks.append(asyncio.create_task(metrics.sample_loop()))
+    if settings.MEMORY_RSS_LIMIT_MB:
+        tasks.append(asyncio.create_task(rss_watchdog()))
+    if settings.MEMORY_TRACE_FRAMES:
+        memory_tracer.start(settings.MEMORY_TRACE_FRAMES)
     try:
         yield
     finally:
+        for task in tasks:
+            task.cancel()
         await engine.dispose()
+        if read_engine is not None:
+            await read_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -73,9 +89,14 @@ app = FastAPI(
     },
     openapi_tags=tags_metadata,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Inside CORSMiddleware, so browsers can read the 503s of shed requests
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
@@ -86,43 +107,48 @@ app.add_middleware(
     max_age=600,
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next: Callable):
-    if not request.url.path.startswith(settings.API_V1_STR):
-        return await call_next(request)
-
-    skip_paths = ["/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json"]
-    if request.url.path in skip_paths or request.url.path.endswith((".js", ".css", ".ico")):
-        return await call_next(request)
-
-    start_time = time.time()
-    response = await call_next(request)
-    duration = time.time() - start_time
-
-    if response.status_code >= 400:
-        logger.warning(
-            f"{request.method} {request.url.path} | "
-            f"Status: {response.status_code} | "
-            f"Duration: {duration:.2f}s"
-        )
-    elif settings.DEBUG: 
-        logger.info(
-            f"{request.method} {request.url.path} | "
-            f"Status: {response.status_code}"
-        )
-
-    return response
-
-@app.middleware("http")
-async def catch_exceptions(request: Request, call_next: Callable):
-    try:
-        return await call_next(request)
-    except Exception as e:
-        logger.error(f"{request.method} {request.url.path} | Error: {str(e)}")
-        raise
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, e: DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "The request took too long. Try narrowing the search."}
+    )
+
+@app.exception_handler(exc.DBAPIError)
+async def database_error_handler(request: Request, e: exc.DBAPIError):
+    if not is_statement_timeout(e):
+        raise e
+    logger.warning("%s %s | Query cancelled by its latency budget", request.method, request.url.path)
+    return await deadline_exceeded_handler(request, DeadlineExceeded())
+
+@app.exception_handler(exc.TimeoutError)
+async def pool_timeout_handler(request: Request, e: exc.TimeoutError):
+    # No database connection freed up within DB_POOL_TIMEOUT
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The server is busy. Please try again shortly."},
+        headers={"Retry-After": "5"}
+    )
+
+# Inside RequestMiddleware, so a profile covers only the application
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+app.add_middleware(RequestMiddleware)
+
+# Outermost, so it sees the headers set by RequestMiddleware
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     return {"status": "ok", "message": "BAMN - Server is running"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+    def get_metrics():
+        # Sync, so reading the multiprocess files happens in the threadpool
+        body, content_type = metrics.render()
+        return Response(content=body, media_type=content_type)
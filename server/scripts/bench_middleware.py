@@ -0,0 +1,185 @@
+"""
+Compare request throughput through the old BaseHTTPMiddleware stack and
+RequestMiddleware (app/core/middleware.py).
+
+Both variants wrap the same application router and are driven in-process
+through ASGI, without a server or sockets, so the difference is the
+middleware layer alone:
+
+    python scripts/bench_middleware.py --requests 5000 --concurrency 20
+
+/mentors/{id} runs a real query, so point DATABASE_URL at a database with
+at least one approved mentor. Logging is silenced on both sides.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Request
+from sqlalchemy import select
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+
+from main import app as main_app
+from app.core.config import settings
+from app.core.middleware import RequestMiddleware
+from app.db.instrumentation import QueryStats, current_query_stats, finish_request
+from app.db.session import AsyncSessionMaker, engine
+from app.models.enums import ModerationStatus
+from app.models.mentor import Mentor
+
+logger = logging.getLogger("main")
+
+# The middleware main.py registered with @app.middleware("http"), verbatim
+async def log_requests(request: Request, call_next: Callable):
+    if not request.url.path.startswith(settings.API_V1_STR):
+        return await call_next(request)
+
+    skip_paths = ["/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json"]
+    if request.url.path in skip_paths or request.url.path.endswith((".js", ".css", ".ico")):
+        return await call_next(request)
+
+    start_time = time.time()
+    response = await call_next(request)
+    duration = time.time() - start_time
+
+    if response.status_code >= 400:
+        logger.warning(
+            f"{request.method} {request.url.path} | "
+            f"Status: {response.status_code} | "
+            f"Duration: {duration:.2f}s"
+        )
+    elif settings.DEBUG:
+        logger.info(
+            f"{request.method} {request.url.path} | "
+            f"Status: {response.status_code}"
+        )
+
+    return response
+
+async def catch_exceptions(request: Request, call_next: Callable):
+    try:
+        return await call_next(request)
+    except Exception as e:
+        logger.error(f"{request.method} {request.url.path} | Error: {str(e)}")
+        raise
+
+async def query_stats(request: Request, call_next: Callable):
+    if not settings.QUERY_STATS_ENABLED or not request.url.path.startswith(settings.API_V1_STR):
+        return await call_next(request)
+
+    stats = QueryStats(f"{request.method} {request.url.path}")
+    token = current_query_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+
+    route = request.scope.get("route")
+    server_timing = finish_request(
+        f"{request.method} {route.path if route else 'unmatched'}",
+        stats,
+        time.perf_counter() - start
+    )
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers.append("Server-Timing", server_timing)
+    return response
+
+def legacy_stack(app: ASGIApp) -> ASGIApp:
+    # Registration order: the last one registered is outermost
+    for dispatch in (log_requests, catch_exceptions, query_stats):
+        app = BaseHTTPMiddleware(app, dispatch=dispatch)
+    return app
+
+async def request(app: ASGIApp, path: str) -> int:
+    """One GET through app; the client disconnects after the response"""
+    done = asyncio.Event()
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif not message.get("more_body", False):
+            done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+        "app": main_app
+    }
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+async def requests_per_second(app: ASGIApp, path: str, total: int, concurrency: int) -> float:
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            status = await request(app, path)
+            if status != 200:
+                sys.exit(f"{path} returned {status}")
+
+    await asyncio.gather(*(worker() for _ in range(min(50, total) // concurrency or 1)))
+    remaining = total
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+async def main(total: int, concurrency: int) -> None:
+    logging.disable(logging.WARNING)
+    async with AsyncSessionMaker() as db:
+        mentor_id = await db.scalar(
+            select(Mentor.id).where(Mentor.moderation_status == ModerationStatus.APPROVED).limit(1)
+        )
+    if mentor_id is None:
+        sys.exit("Need at least one approved mentor to benchmark against")
+
+    # The router with the application's routes, below all middleware
+    router = main_app.router
+    variants = [("before", legacy_stack(router)), ("after", RequestMiddleware(router))]
+    print(f"{total} requests, {concurrency} concurrent")
+    print(f"{'path':24s} {'before':>12s} {'after':>12s} {'change':>8s}")
+    for path in ("/health", f"{settings.API_V1_STR}/mentors/{mentor_id}"):
+        rates = {name: await requests_per_second(app, path, total, concurrency) for name, app in variants}
+        print(
+            f"{path[:24]:24s} {rates['before']:8.0f} rps {rates['after']:8.0f} rps "
+            f"{(rates['after'] - rates['before']) / rates['before']:+8.0%}"
+        )
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per path and variant")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,162 @@
+"""
+Compare per-call overhead of the hot queries before and after the cached
+query layer in app/services.
+
+Each query runs against DATABASE_URL both as the select() construct the
+endpoints used to rebuild on every request and through the app/services
+function that replaced it. Both sides fetch the same rows, so the
+difference is Python-side statement construction, cache key generation and
+prepared statement reuse:
+
+    python scripts/bench_queries.py --iterations 2000
+
+Run it against a database with some approved mentors, e.g. a local copy.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exists, func, literal, or_, select
+
+from app.db.session import AsyncSessionMaker, engine
+from app.models.auth import RefreshToken, User
+from app.models.enums import ModerationStatus
+from app.models.mentor import Mentor
+from app.services import accounts, tokens
+from app.services import mentors as mentor_queries
+
+async def legacy_search(db, keyword=None, research_interests=(), country=None):
+    query = select(Mentor).where(Mentor.moderation_status == ModerationStatus.APPROVED)
+    if keyword:
+        keyword = keyword.strip().lower()
+        query = query.where(
+            or_(
+                func.lower(Mentor.full_name).contains(keyword),
+                func.lower(Mentor.email).contains(keyword),
+                func.lower(Mentor.institution).contains(keyword),
+                func.lower(Mentor.department).contains(keyword),
+                func.lower(Mentor.current_role).contains(keyword),
+                func.lower(func.array_to_string(Mentor.research_interests, ' ', '')).contains(keyword),
+                func.lower(func.array_to_string(Mentor.degrees, ' ', '')).contains(keyword)
+            )
+        )
+    if research_interests:
+        query = query.where(
+            or_(*[
+                func.lower(func.array_to_string(Mentor.research_interests, ',', '')).like(f'%{interest.lower()}%')
+                for interest in research_interests
+            ])
+        )
+    if country:
+        query = query.where(func.lower(Mentor.country) == country.lower())
+    total = await db.scalar(select(func.count()).select_from(query.subquery())) or 0
+    result = await db.execute(query.offset(0).limit(10))
+    return total, result.scalars().all()
+
+async def legacy_globe(db, research_interests=()):
+    query = select(Mentor).where(Mentor.moderation_status == ModerationStatus.APPROVED)
+    for interest in research_interests:
+        query = query.where(Mentor.research_interests.any(interest))
+    result = await db.execute(query)
+    return result.scalars().all()
+
+async def legacy_suggest(db, prefix):
+    query = select(Mentor.research_interests).where(
+        Mentor.moderation_status == ModerationStatus.APPROVED
+    )
+    result = await db.execute(query)
+    unique_tags = set(tag.lower() for tags in result.scalars().all() for tag in tags)
+    return sorted(tag for tag in unique_tags if tag.startswith(prefix))[:10]
+
+async def legacy_account(db, email):
+    probe = select(literal(email).label("email")).subquery("probe")
+    query = (
+        select(User, Mentor)
+        .select_from(probe)
+        .outerjoin(User, User.email == probe.c.email)
+        .outerjoin(Mentor, Mentor.email == probe.c.email)
+    )
+    result = await db.execute(query)
+    return result.one()
+
+def build_cases(mentor, admin_id, token, family_id):
+    tag = mentor.research_interests[0]
+    mentor_by_id = lambda db: db.execute(select(Mentor).where(Mentor.id == mentor.id))
+    approved_by_id = lambda db: db.execute(select(Mentor).where(
+        Mentor.id == mentor.id,
+        Mentor.moderation_status == ModerationStatus.APPROVED
+    ))
+    admin_by_id = lambda db: db.execute(select(User).where(User.id == admin_id, User.role == "admin"))
+    token_by_hash = lambda db: db.execute(select(RefreshToken).where(
+        RefreshToken.token_hash == tokens.hash_refresh_token(token)
+    ))
+    family_revoked = lambda db: db.scalar(select(exists().where(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.isnot(None)
+    )))
+    return [
+        ("mentor by id", mentor_by_id,
+         lambda db: mentor_queries.get_mentor_by_id(db, mentor.id)),
+        ("approved mentor by id", approved_by_id,
+         lambda db: mentor_queries.get_approved_mentor_by_id(db, mentor.id)),
+        ("admin by id", admin_by_id,
+         lambda db: mentor_queries.get_admin_by_id(db, admin_id)),
+        ("account by email", lambda db: legacy_account(db, mentor.email),
+         lambda db: accounts.resolve_account_by_email(db, mentor.email)),
+        ("search keyword", lambda db: legacy_search(db, keyword="a"),
+         lambda db: mentor_queries.search_approved_mentors(db, keyword="a")),
+        ("search 3 interests + country", lambda db: legacy_search(db, research_interests=[tag, "x", "y"], country=mentor.country),
+         lambda db: mentor_queries.search_approved_mentors(db, research_interests=[tag, "x", "y"], country=mentor.country)),
+        ("globe by interest", lambda db: legacy_globe(db, [tag]),
+         lambda db: mentor_queries.list_globe_mentors(db, [tag])),
+        ("suggest tags", lambda db: legacy_suggest(db, tag[:1].lower()),
+         lambda db: mentor_queries.suggest_research_interests(db, tag[:1], 10)),
+        ("refresh token by hash", token_by_hash,
+         lambda db: tokens.find_refresh_token(db, token)),
+        ("family revoked", family_revoked,
+         lambda db: tokens.is_family_revoked(db, family_id)),
+    ]
+
+async def time_calls(db, call, iterations: int) -> float:
+    """Median microseconds per call, after a warm-up"""
+    for _ in range(min(50, iterations)):
+        await call(db)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call(db)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+async def main(iterations: int) -> None:
+    async with AsyncSessionMaker() as db:
+        mentor = (await db.execute(
+            select(Mentor).where(Mentor.moderation_status == ModerationStatus.APPROVED).limit(1)
+        )).scalar_one_or_none()
+        if mentor is None:
+            sys.exit("Need at least one approved mentor to benchmark against")
+        admin_id = (await db.execute(select(User.id).limit(1))).scalar_one_or_none() or mentor.id
+        token, record = await tokens.issue_refresh_token(db, mentor.id, "mentor")
+        # Put the family in the filter so is_family_revoked reaches the database too
+        tokens.revocation_filter.add(record.family_id)
+
+        print(f"{'query':32s} {'before':>10s} {'after':>10s} {'change':>8s}")
+        for name, legacy, cached in build_cases(mentor, admin_id, token, record.family_id):
+            before = await time_calls(db, legacy, iterations)
+            after = await time_calls(db, cached, iterations)
+            print(f"{name:32s} {before:8.0f}us {after:8.0f}us {(after - before) / before:+8.0%}")
+
+        await db.delete(record)
+        await db.commit()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000, help="Timed calls per query and variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
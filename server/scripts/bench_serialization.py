@@ -0,0 +1,126 @@
+"""
+Compare serialization time of mentor lists before and after the fast path
+in app/core/serialization.py.
+
+Builds N transient Mentor ORM objects (no database needed) and renders them
+the way list endpoints used to, through FastAPI's response_model handling
+and json.dumps, and through render_list with and without
+TRUSTED_SERIALIZATION_ENABLED. The search endpoint used to validate its
+items twice, once into SearchResponse and again as the response_model, and
+is measured separately:
+
+    python scripts/bench_serialization.py --mentors 1000 --iterations 50
+
+Every variant is checked to produce the same JSON before timing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.config import settings
+from app.core.serialization import render_list
+from app.models.enums import AuthProvider, ModerationStatus
+from app.models.mentor import Mentor
+from app.schemas.mentor import MentorResponse, SearchResponse
+
+def make_mentors(count: int) -> List[Mentor]:
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Mentor(
+            id=uuid.uuid4(),
+            full_name=f"Dr. Mentor {i}",
+            email=f"mentor{i}@university.edu",
+            current_role="Associate Professor",
+            institution="Massachusetts Institute of Technology",
+            department="Department of Computer Science",
+            degrees=["Ph.D. in Computer Science, Stanford University, 2020", "B.Sc. in CSE, BUET, 2014"],
+            research_interests=["Machine Learning", "Natural Language Processing", f"Topic {i % 50}"],
+            continent="North America",
+            country="United States",
+            city="Cambridge",
+            latitude=42.3601 + i / 10000,
+            longitude=-71.0942 - i / 10000,
+            linkedin_url=f"https://www.linkedin.com/in/mentor-{i}" if i % 2 else None,
+            profile_picture_url=None,
+            auth_provider=AuthProvider.EMAIL,
+            moderation_status=ModerationStatus.APPROVED,
+            created_at=created + timedelta(minutes=i, microseconds=i),
+            updated_at=None if i % 3 else created + timedelta(days=1)
+        )
+        for i in range(count)
+    ]
+
+async def legacy_list(mentors) -> bytes:
+    field = create_response_field(name="Response", type_=List[MentorResponse])
+    content = await serialize_response(field=field, response_content=mentors)
+    return JSONResponse(content).body
+
+async def legacy_search(mentors) -> bytes:
+    field = create_response_field(name="Response", type_=SearchResponse)
+    response = SearchResponse(items=mentors, total=len(mentors), page=1, page_size=len(mentors))
+    content = await serialize_response(field=field, response_content=response)
+    return JSONResponse(content).body
+
+async def render(mentors, trusted: bool) -> bytes:
+    settings.TRUSTED_SERIALIZATION_ENABLED = trusted
+    return render_list(MentorResponse, mentors)
+
+async def search_page(mentors, trusted: bool) -> bytes:
+    # As mentors._search_page builds it
+    items = await render(mentors, trusted)
+    return b'{"items":' + items + f',"total":{len(mentors)},"page":1,"page_size":{len(mentors)}}}'.encode()
+
+async def time_calls(call, iterations: int) -> float:
+    """Median milliseconds per call, after a warm-up"""
+    for _ in range(min(5, iterations)):
+        await call()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+async def main(count: int, iterations: int) -> None:
+    mentors = make_mentors(count)
+    cases = [
+        ("list", lambda: legacy_list(mentors), [
+            ("validated", lambda: render(mentors, trusted=False)),
+            ("trusted", lambda: render(mentors, trusted=True)),
+        ]),
+        ("search page", lambda: legacy_search(mentors), [
+            ("validated", lambda: search_page(mentors, trusted=False)),
+            ("trusted", lambda: search_page(mentors, trusted=True)),
+        ]),
+    ]
+
+    print(f"{count} mentors, median of {iterations} runs")
+    print(f"{'response':24s} {'before':>10s} {'after':>10s} {'change':>8s}")
+    for name, legacy, variants in cases:
+        expected = json.loads(await legacy())
+        before = await time_calls(legacy, iterations)
+        for variant, call in variants:
+            if json.loads(await call()) != expected:
+                sys.exit(f"{name} ({variant}) renders different JSON")
+            after = await time_calls(call, iterations)
+            print(f"{name + ' (' + variant + ')':24s} {before:8.2f}ms {after:8.2f}ms {(after - before) / before:+8.0%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mentors", type=int, default=1000, help="Mentors per rendered list")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed renders per variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.mentors, args.iterations))
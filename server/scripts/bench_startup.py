@@ -0,0 +1,88 @@
+"""
+Measure worker startup time: importing the app and preparing the schema.
+
+Every sample runs in a fresh interpreter, like a newly booted worker:
+
+    python scripts/bench_startup.py --samples 5
+
+"eager imports" additionally loads the modules that are now imported on
+first use (jose, passlib, google-auth), to show what lazy loading saves.
+The schema rows time each SCHEMA_STARTUP_MODE against DATABASE_URL;
+"prepared" is what a gunicorn worker does once the master has verified
+the schema.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_APP = """
+import time
+start = time.perf_counter()
+import main
+{extra}
+print((time.perf_counter() - start) * 1000)
+"""
+
+EAGER_IMPORTS = """
+import jose.jwt, passlib.context, google.oauth2.id_token, google.auth.transport.requests
+from app.core.security import get_pwd_context
+get_pwd_context()
+"""
+
+PREPARE_SCHEMA = """
+import asyncio, time
+from app.db.session import engine
+from app.db.schema import prepare_schema
+
+async def run():
+    start = time.perf_counter()
+    await prepare_schema(engine)
+    elapsed = (time.perf_counter() - start) * 1000
+    await engine.dispose()
+    return elapsed
+
+print(asyncio.run(run()))
+"""
+
+def time_in_subprocess(code: str, env_overrides: dict, samples: int) -> float:
+    """Median of the milliseconds printed by code, one interpreter per sample"""
+    env = {**os.environ, **env_overrides}
+    timings = []
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=SERVER_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--skip-db", action="store_true", help="Only measure imports")
+    args = parser.parse_args()
+
+    rows = [
+        ("import main (lazy)", IMPORT_APP.format(extra=""), {}),
+        ("import main + eager imports", IMPORT_APP.format(extra=EAGER_IMPORTS), {}),
+    ]
+    if not args.skip_db:
+        rows += [
+            ("schema: create_all", PREPARE_SCHEMA, {"SCHEMA_STARTUP_MODE": "create_all"}),
+            ("schema: verify", PREPARE_SCHEMA, {"SCHEMA_STARTUP_MODE": "verify"}),
+            ("schema: prepared by master", PREPARE_SCHEMA, {"BAMN_SCHEMA_PREPARED": "1"}),
+        ]
+
+    for name, code, env in rows:
+        try:
+            print(f"{name:32s} {time_in_subprocess(code, env, args.samples):8.1f} ms")
+        except subprocess.CalledProcessError as e:
+            print(f"{name:32s}   failed: {e.stderr.strip().splitlines()[-1]}")
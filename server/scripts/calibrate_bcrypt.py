@@ -0,0 +1,51 @@
+"""
+Benchmark bcrypt on this machine and recommend a BCRYPT_ROUNDS value.
+
+Each extra round doubles the cost of a hash and of every login verify.
+Run this on the deployment hardware and pick the highest cost that keeps
+a verify under the target latency:
+
+    python scripts/calibrate_bcrypt.py --target-ms 250
+
+Existing hashes are upgraded to the new cost on each user's next login.
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import bcrypt
+
+SAMPLE_PASSWORD = "calibration-Passw0rd!"
+
+def time_verify(rounds: int, samples: int) -> float:
+    """Median time in milliseconds to verify one password at the given cost"""
+    hashed = bcrypt.using(rounds=rounds).hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.verify(SAMPLE_PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate(target_ms: float, min_rounds: int, max_rounds: int, samples: int) -> int:
+    recommended = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        verify_ms = time_verify(rounds, samples)
+        fits = verify_ms <= target_ms
+        print(f"rounds={rounds:2d}  verify={verify_ms:8.1f} ms  {'ok' if fits else 'over target'}")
+        if fits:
+            recommended = rounds
+        else:
+            # Higher costs only get slower
+            break
+    return recommended
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target-ms", type=float, default=250, help="Target verify latency per login")
+    parser.add_argument("--min-rounds", type=int, default=10, help="Never recommend less than this")
+    parser.add_argument("--max-rounds", type=int, default=16, help="Stop benchmarking at this cost")
+    parser.add_argument("--samples", type=int, default=5, help="Verifies timed per cost")
+    args = parser.parse_args()
+
+    rounds = calibrate(args.target_ms, args.min_rounds, args.max_rounds, args.samples)
+    print(f"\nRecommended: BCRYPT_ROUNDS={rounds}")